@@ -0,0 +1,194 @@
+"""stac_tiler.assets: STAC item asset index."""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Hashable, List, Optional, Sequence, Set, Tuple
+
+from .concurrency import make_key
+
+
+@dataclass(frozen=True)
+class AssetInfo:
+    """STAC asset summary."""
+
+    name: str
+    href: str
+    type: Optional[str]
+    roles: FrozenSet[str]
+    bands: Tuple[Dict, ...]
+    resolution: Optional[float]
+
+
+def _asset_bands(asset_info: Dict, item_bands: Sequence[Dict]) -> Tuple[Dict, ...]:
+    """Return asset `eo:bands` (STAC 1.0 dicts or STAC 0.9 item band indexes)."""
+    bands = []
+    for band in asset_info.get("eo:bands", []):
+        if isinstance(band, int):
+            band = item_bands[band] if band < len(item_bands) else {}
+        bands.append(band)
+
+    return tuple(bands)
+
+
+def _asset_resolution(asset_info: Dict, properties: Dict) -> Optional[float]:
+    """Return asset resolution from `gsd` or `proj:transform`."""
+    if "gsd" in asset_info:
+        return asset_info["gsd"]
+
+    transform = asset_info.get("proj:transform")
+    if transform:
+        return abs(transform[0])
+
+    return properties.get("gsd")
+
+
+Selection = Tuple[Tuple[str, ...], FrozenSet[str]]
+_SELECTIONS_SIZE = 64
+
+
+class AssetIndex:
+    """
+    Index of a STAC item assets.
+
+    Built once per item (see `get_asset_index`) so readers can select assets
+    with set operations instead of walking `item["assets"]`. Hrefs should
+    still be read from the item itself, they might be signed per request.
+
+    Attributes
+    ----------
+    names: tuple
+        Asset names, in item order.
+    assets: dict
+        Asset name to `AssetInfo`.
+    by_type: dict
+        Media type to asset names.
+    by_role: dict
+        Role to asset names.
+    by_band: dict
+        Band name or common name to `(asset name, band index)` list.
+
+    """
+
+    def __init__(self, item: Dict):
+        """Build the index."""
+        properties = item.get("properties", {})
+        item_bands = properties.get("eo:bands", [])
+
+        self.names: Tuple[str, ...] = tuple(item["assets"])
+        self._position = {name: ix for ix, name in enumerate(self.names)}
+        self.assets: Dict[str, AssetInfo] = {}
+        self.by_type: Dict[Optional[str], Set[str]] = {}
+        self.by_role: Dict[str, Set[str]] = {}
+        self.by_band: Dict[str, List[Tuple[str, int]]] = {}
+
+        for name, asset_info in item["assets"].items():
+            info = AssetInfo(
+                name=name,
+                href=asset_info["href"],
+                type=asset_info.get("type"),
+                roles=frozenset(asset_info.get("roles", [])),
+                bands=_asset_bands(asset_info, item_bands),
+                resolution=_asset_resolution(asset_info, properties),
+            )
+            self.assets[name] = info
+            self.by_type.setdefault(info.type, set()).add(name)
+            for role in info.roles:
+                self.by_role.setdefault(role, set()).add(name)
+
+            for bidx, band in enumerate(info.bands, 1):
+                for band_name in {band.get("name"), band.get("common_name")} - {None}:
+                    self.by_band.setdefault(band_name, []).append((name, bidx))
+
+        self._selections: "OrderedDict[Hashable, Selection]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _union(self, index: Dict, keys: Set) -> Set[str]:
+        return set().union(*(index.get(key, set()) for key in keys))
+
+    def select(
+        self,
+        include: Optional[Set[str]] = None,
+        exclude: Optional[Set[str]] = None,
+        include_asset_types: Optional[Set[str]] = None,
+        exclude_asset_types: Optional[Set[str]] = None,
+        include_asset_roles: Optional[Set[str]] = None,
+    ) -> Selection:
+        """Return selected asset names (in item order and as a set)."""
+        options = tuple(
+            frozenset(opt) if opt is not None else None
+            for opt in (
+                include,
+                exclude,
+                include_asset_types,
+                exclude_asset_types,
+                include_asset_roles,
+            )
+        )
+        with self._lock:
+            selection = self._selections.get(options)
+            if selection is not None:
+                self._selections.move_to_end(options)
+                return selection
+
+        names = set(self.names)
+        if include:
+            names &= include
+        if exclude:
+            names -= exclude
+        if include_asset_types:
+            names &= self._union(self.by_type, include_asset_types)
+        if exclude_asset_types:
+            names -= self._union(self.by_type, exclude_asset_types)
+        if include_asset_roles:
+            names &= self._union(self.by_role, include_asset_roles)
+
+        selection = (
+            tuple(sorted(names, key=self._position.__getitem__)),
+            frozenset(names),
+        )
+        with self._lock:
+            self._selections[options] = selection
+            while len(self._selections) > _SELECTIONS_SIZE:
+                self._selections.popitem(last=False)
+        return selection
+
+    def get_band(self, name: str) -> Sequence[Tuple[str, int]]:
+        """Return `(asset name, band index)` for a band name or common name."""
+        return self.by_band.get(name, [])
+
+
+_INDEX_CACHE: "OrderedDict[Hashable, Tuple[Optional[Dict], AssetIndex]]" = OrderedDict()
+_INDEX_CACHE_SIZE = 512
+_INDEX_LOCK = threading.Lock()
+
+
+def get_asset_index(item: Dict) -> AssetIndex:
+    """
+    Return the (cached) asset index of a STAC item.
+
+    Indexes are cached by item id and `updated` property (not hrefs, which
+    can be signed per request), or by item object for items without
+    `updated` (e.g. items memoised by `stac_tiler.reader.fetch`). Items are
+    expected to be immutable: an item changed in place keeps its index.
+
+    """
+    updated = item.get("properties", {}).get("updated")
+    key = make_key(item.get("collection"), item.get("id"), updated) if updated else None
+    owner = None
+    if key is None:
+        key, owner = id(item), item
+
+    with _INDEX_LOCK:
+        entry = _INDEX_CACHE.get(key)
+        # The entry holds its item, so the object id isn't reused meanwhile
+        if entry is not None and entry[0] is owner:
+            _INDEX_CACHE.move_to_end(key)
+            return entry[1]
+
+    index = AssetIndex(item)
+    with _INDEX_LOCK:
+        _INDEX_CACHE[key] = (owner, index)
+        while len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+            _INDEX_CACHE.popitem(last=False)
+    return index
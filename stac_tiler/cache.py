@@ -0,0 +1,245 @@
+"""stac_tiler.cache: decoded asset block cache."""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy
+
+Arrays = Tuple[numpy.ndarray, ...]
+Entry = Tuple[float, int, List[str]]
+
+
+def scan_entries(
+    directory: str, entry: Callable[[str], str] = lambda name: name
+) -> List[Entry]:
+    """
+    Return the cache entries of a directory as (mtime, size, paths), oldest first.
+
+    Files are grouped in entries by `entry(file name)`, and an entry is as
+    recent as its most recently modified file. Hidden files (writes in
+    progress) are ignored.
+
+    """
+    entries: Dict[str, Entry] = {}
+    with os.scandir(directory) as files:
+        for f in files:
+            if f.name.startswith("."):
+                continue
+            try:
+                stat = f.stat()
+            except OSError:  # Removed by another process
+                continue
+
+            name = entry(f.name)
+            mtime, size, paths = entries.get(name, (0.0, 0, []))
+            entries[name] = (
+                max(mtime, stat.st_mtime),
+                size + stat.st_size,
+                paths + [f.path],
+            )
+
+    return sorted(entries.values(), key=lambda e: e[0])
+
+
+class ArrayCache:
+    """
+    LRU cache of decoded asset reads with a memory budget and an optional disk tier.
+
+    Values are tuples of numpy arrays (e.g. the `(data, mask)` returned by
+    `COGReader.tile`). Arrays are stored read-only and returned as is, so
+    callers must copy before modifying them.
+
+    The memory tier holds up to `max_size` bytes. When `directory` is set,
+    every entry is also written there as `.npy` files and read back
+    memory-mapped on a memory miss, which lets several processes share the
+    same warm cache. The whole directory is bounded by `max_disk_size` bytes:
+    it is scanned after every `max_disk_size / 16` bytes written by a process
+    and the least recently used entries (by modification time, refreshed on
+    hits) are removed.
+
+    Attributes
+    ----------
+    max_size: int
+        Memory tier budget in bytes, 0 disables the memory tier.
+    directory: str, optional
+        Disk tier directory.
+    max_disk_size: int
+        Disk tier budget in bytes (for the whole directory), 0 means unbounded.
+
+    """
+
+    def __init__(
+        self,
+        max_size: int = 0,
+        directory: Optional[str] = None,
+        max_disk_size: int = 0,
+    ):
+        """Initialize the cache tiers."""
+        self.max_size = max_size
+        self.directory = directory
+        self.max_disk_size = max_disk_size
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[Hashable, Arrays]" = OrderedDict()
+        self._prune_lock = threading.Lock()
+        self._disk_written = 0
+        self.size = 0
+        self.disk_size = 0
+        self.hits = 0
+        self.misses = 0
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if at least one tier is active."""
+        return bool(self.max_size or self.directory)
+
+    @staticmethod
+    def _digest(key: Hashable) -> str:
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def _disk_paths(self, digest: str, count: int) -> Sequence[str]:
+        return [
+            os.path.join(self.directory, f"{digest}_{ix}.npy") for ix in range(count)
+        ]
+
+    def get(self, key: Hashable) -> Optional[Arrays]:
+        """Return cached arrays for key or None."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+
+        # Memory-mapped disk hits are not moved to the memory tier, their pages
+        # are managed by the OS page cache
+        value = self._get_disk(key) if self.directory else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return value
+
+    def set(self, key: Hashable, value: Arrays):
+        """Add arrays to the cache."""
+        value = tuple(numpy.asarray(v) for v in value)
+        for v in value:
+            v.setflags(write=False)
+
+        self._set_memory(key, value)
+        if self.directory:
+            self._set_disk(key, value)
+
+    def clear(self):
+        """Empty the memory tier."""
+        with self._lock:
+            self._memory.clear()
+            self.size = 0
+
+    def _set_memory(self, key: Hashable, value: Arrays):
+        nbytes = sum(v.nbytes for v in value)
+        if nbytes > self.max_size:
+            return
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+
+            self._memory[key] = value
+            self.size += nbytes
+            while self.size > self.max_size:
+                _, old = self._memory.popitem(last=False)
+                self.size -= sum(v.nbytes for v in old)
+
+    def _get_disk(self, key: Hashable) -> Optional[Arrays]:
+        digest = self._digest(key)
+        index = os.path.join(self.directory, f"{digest}.count")
+        try:
+            with open(index) as f:
+                count = int(f.read())
+            value = tuple(
+                numpy.load(path, mmap_mode="r")
+                for path in self._disk_paths(digest, count)
+            )
+        except (OSError, ValueError):
+            return None
+
+        try:
+            os.utime(index)  # Mark as recently used
+        except OSError:
+            pass
+        return value
+
+    def _set_disk(self, key: Hashable, value: Arrays):
+        digest = self._digest(key)
+        nbytes = 0
+        for path, array in zip(self._disk_paths(digest, len(value)), value):
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                numpy.save(f, array)
+            os.replace(tmp, path)
+            nbytes += array.nbytes
+
+        # The `.count` file is written last so readers never see partial entries
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".")
+        with os.fdopen(fd, "w") as f:
+            f.write(str(len(value)))
+        os.replace(tmp, os.path.join(self.directory, f"{digest}.count"))
+
+        with self._lock:
+            self._disk_written += nbytes
+            prune = self.max_disk_size and self._disk_written > self.max_disk_size / 16
+        if prune:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """Remove the least recently used entries over the directory budget."""
+        if not self._prune_lock.acquire(blocking=False):
+            return  # Another thread is pruning
+
+        try:
+            # Entry files are `{digest}.count` and `{digest}_{i}.npy`
+            entries = scan_entries(
+                self.directory, lambda name: name.split(".")[0].split("_")[0]
+            )
+            size = sum(entry_size for _, entry_size, _ in entries)
+            for _, entry_size, paths in entries:
+                if size <= self.max_disk_size:
+                    break
+
+                # Remove `.count` first so readers never see partial entries
+                for path in sorted(paths, key=lambda p: not p.endswith(".count")):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                size -= entry_size
+
+            with self._lock:
+                self.disk_size = size
+                self._disk_written = 0
+        finally:
+            self._prune_lock.release()
+
+    @property
+    def metrics(self) -> Dict:
+        """Return cache usage counters."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "max_size": self.max_size,
+                "items": len(self._memory),
+                "disk_size": self.disk_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,302 @@
+"""stac_tiler.catalog: spatial index over static STAC items."""
+
+import datetime as dt
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import morecantile
+import numpy
+
+from .reader import TMS, STACReader, fetch
+
+
+def _to_timestamp(value: Optional[str]) -> float:
+    """Convert a STAC datetime to a POSIX timestamp (NaN when missing)."""
+    if not value:
+        return numpy.nan
+
+    if isinstance(value, dt.datetime):
+        date = value
+    else:
+        date = dt.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=dt.timezone.utc)
+
+    return date.timestamp()
+
+
+def _bbox_2d(bbox: Sequence[float]) -> List[float]:
+    """Return (minx, miny, maxx, maxy) from a 2D or 3D STAC bbox."""
+    bbox = list(bbox)
+    return bbox[:2] + bbox[3:5] if len(bbox) == 6 else bbox
+
+
+def _intersects(boxes: numpy.ndarray, bbox: Sequence[float]) -> numpy.ndarray:
+    """Return a mask of the boxes intersecting bbox."""
+    return (
+        (boxes[:, 0] <= bbox[2])
+        & (boxes[:, 2] >= bbox[0])
+        & (boxes[:, 1] <= bbox[3])
+        & (boxes[:, 3] >= bbox[1])
+    )
+
+
+def _str_pack(bboxes: numpy.ndarray, node_size: int) -> numpy.ndarray:
+    """Return the Sort-Tile-Recursive order of bboxes."""
+    count = len(bboxes)
+    if count <= node_size:
+        return numpy.arange(count)
+
+    centers = (bboxes[:, :2] + bboxes[:, 2:]) / 2
+    leaves = int(numpy.ceil(count / node_size))
+    slice_size = int(numpy.ceil(numpy.sqrt(leaves))) * node_size
+
+    by_x = numpy.argsort(centers[:, 0], kind="stable")
+    order = []
+    for start in range(0, count, slice_size):
+        chunk = by_x[start : start + slice_size]
+        order.append(chunk[numpy.argsort(centers[chunk, 1], kind="stable")])
+
+    return numpy.concatenate(order)
+
+
+def _build_levels(bboxes: numpy.ndarray, node_size: int) -> List[numpy.ndarray]:
+    """Return node bboxes for each tree level, from the leaves to the root."""
+    levels = []
+    boxes = bboxes
+    while len(boxes) > 1:
+        count = int(numpy.ceil(len(boxes) / node_size))
+        padded = numpy.full((count * node_size, 4), numpy.nan)
+        padded[: len(boxes)] = boxes
+        padded = padded.reshape(count, node_size, 4)
+        boxes = numpy.stack(
+            [
+                numpy.nanmin(padded[:, :, 0], axis=1),
+                numpy.nanmin(padded[:, :, 1], axis=1),
+                numpy.nanmax(padded[:, :, 2], axis=1),
+                numpy.nanmax(padded[:, :, 3], axis=1),
+            ],
+            axis=1,
+        )
+        levels.append(boxes)
+
+    return levels
+
+
+class CatalogIndex:
+    """
+    Packed R-tree over STAC items bounding boxes.
+
+    Items are sorted with the Sort-Tile-Recursive algorithm, and each tree
+    level is a flat array of node bboxes (node `i` covers the children
+    `[i * node_size, (i + 1) * node_size)` of the level below), so queries
+    are a few vectorized numpy comparisons per level. Datetime and property
+    filters are applied to the spatial candidates.
+
+    Items are matched on their `bbox` only (not their geometry).
+
+    Examples
+    --------
+    index = CatalogIndex.from_items(["item1.json", "item2.json"])
+    index.save("catalog_index")
+
+    index = CatalogIndex.load("catalog_index")
+    for stac in index.tile_readers(289, 207, 9, datetime=("2020-01-01", None)):
+        with stac:
+            stac.tile(289, 207, 9, assets="B01")
+
+    Attributes
+    ----------
+    records: list
+        Item records (`id`, `href` or `item`, `properties`), in packed order.
+    bboxes: numpy.ndarray
+        Item bboxes, in packed order.
+    datetimes: numpy.ndarray
+        Item start and end POSIX timestamps, in packed order.
+    node_size: int
+        Number of children per tree node.
+
+    """
+
+    def __init__(
+        self,
+        records: List[Dict],
+        bboxes: numpy.ndarray,
+        datetimes: numpy.ndarray,
+        levels: Optional[List[numpy.ndarray]] = None,
+        node_size: int = 16,
+    ):
+        """Initialize the index from packed arrays."""
+        self.records = records
+        self.bboxes = bboxes
+        self.datetimes = datetimes
+        self.node_size = node_size
+        self.levels = levels if levels is not None else _build_levels(bboxes, node_size)
+
+    @classmethod
+    def from_items(
+        cls, items: Iterable[Union[str, Dict]], node_size: int = 16
+    ) -> "CatalogIndex":
+        """Build the index from STAC items (dicts, paths or URLs)."""
+        records, bboxes, datetimes = [], [], []
+        for item in items:
+            href = None
+            if isinstance(item, str):
+                href, item = item, fetch(item)
+
+            properties = item.get("properties", {})
+            record = {"id": item.get("id"), "properties": properties}
+            if href:
+                record["href"] = href
+            else:
+                record["item"] = item
+
+            records.append(record)
+            bboxes.append(_bbox_2d(item["bbox"]))
+            datetimes.append(
+                (
+                    _to_timestamp(
+                        properties.get("start_datetime") or properties.get("datetime")
+                    ),
+                    _to_timestamp(
+                        properties.get("end_datetime") or properties.get("datetime")
+                    ),
+                )
+            )
+
+        bboxes = numpy.array(bboxes, dtype="float64").reshape(-1, 4)
+        datetimes = numpy.array(datetimes, dtype="float64").reshape(-1, 2)
+
+        order = _str_pack(bboxes, node_size)
+        return cls(
+            [records[ix] for ix in order],
+            bboxes[order],
+            datetimes[order],
+            node_size=node_size,
+        )
+
+    def save(self, path: str):
+        """Save the index in a directory, arrays as `.npy` files."""
+        os.makedirs(path, exist_ok=True)
+        numpy.save(os.path.join(path, "bboxes.npy"), self.bboxes)
+        numpy.save(os.path.join(path, "datetimes.npy"), self.datetimes)
+        for ix, level in enumerate(self.levels):
+            numpy.save(os.path.join(path, f"level_{ix}.npy"), level)
+
+        with open(os.path.join(path, "records.json"), "w") as f:
+            json.dump(
+                {
+                    "node_size": self.node_size,
+                    "levels": len(self.levels),
+                    "records": self.records,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "CatalogIndex":
+        """Load an index saved with `save` (arrays are memory-mapped by default)."""
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, "records.json")) as f:
+            meta = json.load(f)
+
+        return cls(
+            meta["records"],
+            numpy.load(os.path.join(path, "bboxes.npy"), mmap_mode=mmap_mode),
+            numpy.load(os.path.join(path, "datetimes.npy"), mmap_mode=mmap_mode),
+            levels=[
+                numpy.load(os.path.join(path, f"level_{ix}.npy"), mmap_mode=mmap_mode)
+                for ix in range(meta["levels"])
+            ],
+            node_size=meta["node_size"],
+        )
+
+    def __len__(self) -> int:
+        """Return the number of indexed items."""
+        return len(self.records)
+
+    def _query(self, bbox: Sequence[float]) -> numpy.ndarray:
+        """Return the (packed) indexes of items intersecting bbox."""
+        candidates = numpy.arange(len(self.levels[-1] if self.levels else self.bboxes))
+        for boxes in reversed(self.levels):
+            candidates = candidates[candidates < len(boxes)]
+            candidates = candidates[_intersects(boxes[candidates], bbox)]
+            candidates = (
+                candidates[:, None] * self.node_size + numpy.arange(self.node_size)
+            ).ravel()
+
+        candidates = candidates[candidates < len(self.bboxes)]
+        return candidates[_intersects(self.bboxes[candidates], bbox)]
+
+    def search(
+        self,
+        bbox: Sequence[float],
+        datetime: Optional[Tuple[Optional[Any], Optional[Any]]] = None,
+        query: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict]:
+        """
+        Return records intersecting bbox.
+
+        Attributes
+        ----------
+        bbox: tuple
+            (minx, miny, maxx, maxy) bounds in WGS84.
+        datetime: tuple, optional
+            (start, end) interval, either bound can be None (open).
+        query: dict, optional
+            Property values the items must be equal to.
+
+        """
+        candidates = self._query(bbox)
+
+        if datetime is not None:
+            start, end = (_to_timestamp(value) for value in datetime)
+            datetimes = self.datetimes[candidates]
+            keep = numpy.ones(len(candidates), dtype=bool)
+            if not numpy.isnan(start):
+                keep &= ~(datetimes[:, 1] < start)
+            if not numpy.isnan(end):
+                keep &= ~(datetimes[:, 0] > end)
+            candidates = candidates[keep]
+
+        records = [self.records[ix] for ix in candidates]
+        if query:
+            records = [
+                record
+                for record in records
+                if all(record["properties"].get(k) == v for k, v in query.items())
+            ]
+
+        return records
+
+    def tile(
+        self,
+        tile_x: int,
+        tile_y: int,
+        tile_z: int,
+        tms: morecantile.TileMatrixSet = TMS,
+        **kwargs: Any,
+    ) -> List[Dict]:
+        """Return records intersecting a TMS tile."""
+        bbox = tms.bounds(morecantile.Tile(tile_x, tile_y, tile_z))
+        return self.search(bbox, **kwargs)
+
+    def tile_readers(
+        self,
+        tile_x: int,
+        tile_y: int,
+        tile_z: int,
+        tms: morecantile.TileMatrixSet = TMS,
+        datetime: Optional[Tuple[Optional[Any], Optional[Any]]] = None,
+        query: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> Iterator[STACReader]:
+        """Yield STACReader (to be entered) for items intersecting a TMS tile."""
+        for record in self.tile(
+            tile_x, tile_y, tile_z, tms=tms, datetime=datetime, query=query
+        ):
+            yield STACReader(
+                record.get("href"), item=record.get("item"), tms=tms, **kwargs
+            )
@@ -0,0 +1,378 @@
+"""stac_tiler.concurrency: helpers to coordinate concurrent asset reads."""
+
+import bisect
+import itertools
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent import futures
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
+from urllib.parse import urlparse
+
+from .errors import MemoryBudgetExceeded
+
+
+def make_key(*parts: Any) -> Optional[Hashable]:
+    """Return a hashable key from parts or None if one part isn't hashable."""
+    try:
+        hash(parts)
+    except TypeError:
+        return None
+    return parts
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls sharing the same key into one execution.
+
+    The first caller for a key runs the function, callers arriving while it
+    is in flight wait for and receive the same result (or exception).
+    Results are shared, not copied, so callers must not mutate them.
+
+    Examples
+    --------
+    flight = SingleFlight()
+    flight.do(("tile", href, 1, 2, 3), read_tile)
+
+    """
+
+    def __init__(self):
+        """Initialize the in-flight calls registry."""
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, futures.Future] = {}
+
+    def do(
+        self, key: Optional[Hashable], fn: Callable, *args: Any, **kwargs: Any
+    ) -> Any:
+        """Run `fn` or wait for the identical in-flight call to finish."""
+        if key is None:
+            return fn(*args, **kwargs)
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = futures.Future()
+                self._calls[key] = call
+
+        if not leader:
+            return call.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of calls currently in flight."""
+        with self._lock:
+            return len(self._calls)
+
+
+def get_backend(href: str) -> str:
+    """Return the storage backend (local, http or s3) of an asset url."""
+    scheme = urlparse(href).scheme
+    if scheme == "s3":
+        return "s3"
+
+    elif scheme in ["https", "http"]:
+        return "http"
+
+    return "local"
+
+
+class AdaptiveLimiter:
+    """
+    AIMD (additive increase, multiplicative decrease) concurrency limiter.
+
+    Each completed read adds `1 / limit` to the limit (about +1 per round
+    of reads). An error, or a sustained latency increase, multiplies the
+    limit by `backoff` (at most once per round, to absorb bursts of slow
+    reads).
+
+    Latency increases are measured per `kind` of read (e.g. `tile` and
+    `info` reads are not compared): reads are congested while the median
+    latency of the last `window / 10` reads is higher than `tolerance` times
+    the baseline, the median latency of the last `window` reads. Medians
+    ignore latency jitter and outliers (e.g. cached or retried reads), and
+    the baseline follows lasting changes.
+
+    Examples
+    --------
+    limiter = AdaptiveLimiter(initial=8, max_limit=40)
+    with limiter.slot():
+        read()
+
+    Attributes
+    ----------
+    initial: int
+        Starting limit.
+    min_limit: int
+        Lower bound of the limit.
+    max_limit: int
+        Upper bound of the limit.
+    tolerance: float
+        Recent over baseline median latency ratio considered as congestion.
+    backoff: float
+        Multiplicative decrease factor.
+    error_types: tuple
+        Exceptions considered as backend errors (others only free the slot).
+    window: int
+        Number of reads of the same kind the baseline median latency is taken from.
+
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        tolerance: float = 2.0,
+        backoff: float = 0.75,
+        error_types: Tuple[Type[Exception], ...] = (OSError,),
+        window: int = 500,
+    ):
+        """Initialize the limiter state."""
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.error_types = error_types
+        self.window = window
+
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._condition = threading.Condition()
+        self._decreased_at = 0.0
+        self.in_flight = 0
+        self._latencies: Dict[Hashable, Deque[float]] = {}
+        self._sorted_latencies: Dict[Hashable, List[float]] = {}
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def limit(self) -> int:
+        """Return the current concurrency limit."""
+        return int(self._limit)
+
+    def acquire(self):
+        """Wait for a free slot."""
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+    def baseline(self, kind: Hashable = None) -> Optional[float]:
+        """Return the baseline latency of a kind of read."""
+        with self._condition:
+            return self._baseline(kind)
+
+    def _baseline(self, kind: Hashable) -> Optional[float]:
+        ordered = self._sorted_latencies.get(kind)
+        return ordered[len(ordered) // 2] if ordered else None
+
+    def release(self, latency: float, error: bool = False, kind: Hashable = None):
+        """Free a slot and update the limit from the read outcome."""
+        with self._condition:
+            self.in_flight -= 1
+            self.requests += 1
+            self.latency = (
+                latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            )
+
+            congested = error
+            if not error:
+                samples = self._latencies.get(kind)
+                if samples is None:
+                    samples = self._latencies[kind] = deque(maxlen=self.window)
+                    self._sorted_latencies[kind] = []
+                ordered = self._sorted_latencies[kind]
+                if len(samples) == self.window:
+                    del ordered[bisect.bisect_left(ordered, samples[0])]
+                samples.append(latency)
+                bisect.insort(ordered, latency)
+
+                recent = max(self.window // 10, 1)
+                congested = len(samples) > recent and statistics.median(
+                    itertools.islice(samples, len(samples) - recent, None)
+                ) > self.tolerance * max(ordered[len(ordered) // 2], 1e-3)
+            else:
+                self.errors += 1
+
+            now = time.monotonic()
+            if congested:
+                if now - self._decreased_at > (self.latency or 0.0):
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._decreased_at = now
+            else:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, kind: Hashable = None) -> Iterator:
+        """Hold a slot for the duration of the block and record its outcome."""
+        self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            error = isinstance(e, self.error_types)
+            self.release(time.monotonic() - start, error=error, kind=kind)
+            raise
+        else:
+            self.release(time.monotonic() - start, kind=kind)
+
+    @property
+    def metrics(self) -> Dict:
+        """Return limiter state."""
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "latency": self.latency,
+                "baselines": {kind: self._baseline(kind) for kind in self._latencies},
+                "requests": self.requests,
+                "errors": self.errors,
+            }
+
+
+class MemoryBudget:
+    """
+    Admission control of requests against a global memory budget.
+
+    Requests reserve their estimated peak memory before reading. They wait
+    (in arrival order) while the budget is used by other requests, and are
+    rejected with `MemoryBudgetExceeded` if the estimate is larger than the
+    whole budget or if they waited more than `timeout` seconds. Low priority
+    work (e.g. prefetching) can reserve within `nonblocking()`, where
+    reservations are rejected instead of waiting.
+
+    Examples
+    --------
+    budget = MemoryBudget(max_size=2 * 1024 ** 3, timeout=30)
+    with budget.reserve(256 * 1024 ** 2):
+        read()
+
+    Attributes
+    ----------
+    max_size: int
+        Budget in bytes, 0 disables admission control.
+    timeout: float, optional
+        Maximum waiting time in seconds (None waits forever).
+
+    """
+
+    def __init__(self, max_size: int = 0, timeout: Optional[float] = None):
+        """Initialize the budget."""
+        self.max_size = max_size
+        self.timeout = timeout
+        self._condition = threading.Condition()
+        self._queue: Deque[object] = deque()
+        self._local = threading.local()
+        self.reserved = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def acquire(self, nbytes: int):
+        """Reserve nbytes, waiting for other requests to release memory."""
+        if not self.max_size:
+            return
+
+        if nbytes > self.max_size:
+            with self._condition:
+                self.rejected += 1
+            raise MemoryBudgetExceeded(
+                f"Request needs ~{nbytes} bytes, over the {self.max_size} bytes budget."
+            )
+
+        ticket = object()
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._condition:
+            self._queue.append(ticket)
+            try:
+                while (
+                    self._queue[0] is not ticket
+                    or self.reserved + nbytes > self.max_size
+                ):
+                    if getattr(self._local, "nonblocking", False):
+                        self.rejected += 1
+                        raise MemoryBudgetExceeded(
+                            f"{nbytes} bytes of memory budget are not available."
+                        )
+
+                    remaining = (
+                        None if deadline is None else deadline - time.monotonic()
+                    )
+                    if remaining is not None and remaining <= 0:
+                        self.rejected += 1
+                        raise MemoryBudgetExceeded(
+                            f"Timeout waiting for {nbytes} bytes of memory budget."
+                        )
+                    self._condition.wait(remaining)
+
+                self.reserved += nbytes
+                self.admitted += 1
+            finally:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+
+    def release(self, nbytes: int):
+        """Release a reservation."""
+        if not self.max_size:
+            return
+
+        with self._condition:
+            self.reserved -= nbytes
+            self._condition.notify_all()
+
+    @contextmanager
+    def reserve(self, nbytes: int) -> Iterator:
+        """Hold a reservation for the duration of the block."""
+        self.acquire(nbytes)
+        try:
+            yield
+        finally:
+            self.release(nbytes)
+
+    @contextmanager
+    def nonblocking(self) -> Iterator:
+        """Reject reservations made by this thread in the block instead of waiting."""
+        self._local.nonblocking = True
+        try:
+            yield
+        finally:
+            self._local.nonblocking = False
+
+    @property
+    def metrics(self) -> Dict:
+        """Return budget usage."""
+        with self._condition:
+            return {
+                "max_size": self.max_size,
+                "reserved": self.reserved,
+                "waiting": len(self._queue),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
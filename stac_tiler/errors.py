@@ -0,0 +1,7 @@
+"""stac_tiler.errors."""
+
+from rio_tiler.errors import RioTilerError
+
+
+class MemoryBudgetExceeded(RioTilerError):
+    """Request memory estimate doesn't fit in the memory budget."""
@@ -0,0 +1,142 @@
+"""stac_tiler.expression: band math expression planning."""
+
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import numexpr
+import numpy
+
+_VARIABLE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_ASSET_BAND = re.compile(r"^(?P<asset>.+)_b(?P<bidx>[0-9]+)$")
+
+
+def apply_expression(
+    blocks: Sequence[str], bands: Sequence[str], data: numpy.ndarray
+) -> numpy.ndarray:
+    """Apply rio-tiler expression."""
+    data = dict(zip(bands, data))
+    return numpy.array(
+        [
+            numpy.nan_to_num(numexpr.evaluate(bloc.strip(), local_dict=data))
+            for bloc in blocks
+        ]
+    )
+
+
+class ExpressionPlan:
+    """
+    Map band math expression variables to asset bands.
+
+    Variables can be:
+    - an asset name (`B04`), referring to the asset first band
+    - an asset band (`visual_b1`)
+    - an `eo:bands` name or common name (`red`, `nir`)
+
+    Only the bands used by the expression are read (`asset_indexes`), unless
+    the assets are read with a per-asset expression or user `indexes`, in
+    which case `asset_bN` refers to the Nth band returned for the asset.
+
+    Reading a subset of bands can change the values of the bands read: with
+    per-band nodata, GDAL masks pixels where all *read* bands are nodata. If
+    `subset` returns False for an asset, all its bands are read (its
+    `asset_indexes` entry is None).
+
+    Examples
+    --------
+    plan = ExpressionPlan("(nir-red)/(nir+red)", {"B04", "B08"}, get_band)
+    plan.assets         # ["B08", "B04"]
+    plan.asset_indexes  # [(1,), (1,)]
+
+    """
+
+    def __init__(
+        self,
+        expression: str,
+        assets: Set[str],
+        get_band: Callable[[str], Sequence[Tuple[str, int]]],
+        asset_expression: Optional[str] = "",
+        indexes: Optional[Union[Sequence[int], int]] = None,
+        subset: Optional[Callable[[str], bool]] = None,
+    ):
+        """Parse the expression."""
+        self.expression = expression
+        self.variables: Dict[str, Tuple[str, int]] = {}
+
+        band_names = []
+        for name in dict.fromkeys(_VARIABLE.findall(expression)):
+            match = _ASSET_BAND.match(name)
+            if name in assets:
+                self.variables[name] = (name, 1)
+            elif match and match.group("asset") in assets:
+                self.variables[name] = (match.group("asset"), int(match.group("bidx")))
+            else:
+                band_names.append(name)
+
+        # Prefer bands from assets already read for other variables
+        for name in band_names:
+            bands = get_band(name)
+            if bands:
+                used = {asset for asset, _ in self.variables.values()}
+                self.variables[name] = next(
+                    (band for band in bands if band[0] in used), bands[0]
+                )
+
+        self.assets: List[str] = list(
+            dict.fromkeys(asset for asset, _ in self.variables.values())
+        )
+
+        self.asset_indexes: Optional[List[Optional[Tuple[int, ...]]]] = None
+        self._counts: List[Optional[int]]
+        if asset_expression:
+            self._counts = [len(asset_expression.split(","))] * len(self.assets)
+        elif indexes is not None:
+            count = 1 if isinstance(indexes, int) else len(indexes)
+            self._counts = [count] * len(self.assets)
+        else:
+            self.asset_indexes = [
+                tuple(sorted({b for a, b in self.variables.values() if a == asset}))
+                if subset is None or subset(asset)
+                else None
+                for asset in self.assets
+            ]
+            # Band count of full reads is only known once read
+            self._counts = [
+                len(indexes) if indexes is not None else None
+                for indexes in self.asset_indexes
+            ]
+
+    @property
+    def blocks(self) -> List[str]:
+        """Return expression blocks (one per output band)."""
+        return self.expression.split(",")
+
+    def _rows(self, counts: Sequence[int]) -> List[int]:
+        offsets = numpy.cumsum([0] + list(counts))
+        rows = []
+        for asset, bidx in self.variables.values():
+            ix = self.assets.index(asset)
+            indexes = self.asset_indexes[ix] if self.asset_indexes is not None else None
+            position = indexes.index(bidx) if indexes is not None else bidx - 1
+            rows.append(int(offsets[ix] + position))
+        return rows
+
+    @property
+    def rows(self) -> List[int]:
+        """Return the data row of each variable once assets are concatenated."""
+        if None in self._counts:
+            raise ValueError("Band count of assets read in full is unknown.")
+        return self._rows(self._counts)
+
+    def apply(
+        self, data: Union[numpy.ndarray, Sequence[numpy.ndarray]]
+    ) -> numpy.ndarray:
+        """Evaluate the expression on the concatenated or per-asset data."""
+        if isinstance(data, (list, tuple)):
+            rows = self._rows([len(asset_data) for asset_data in data])
+            data = numpy.concatenate(data)
+        else:
+            rows = self.rows
+
+        return apply_expression(
+            self.blocks, list(self.variables), numpy.asarray(data)[rows]
+        )
@@ -0,0 +1,192 @@
+"""stac_tiler.prefetch: background neighbour tile prefetching."""
+
+import threading
+from collections import deque
+from concurrent import futures
+from typing import Any, Deque, Dict, Hashable, Iterator, Set
+
+import morecantile
+
+from . import reader as stac_reader
+from .concurrency import make_key
+
+# Set in prefetch threads so prefetched tiles don't schedule prefetches
+_LOCAL = threading.local()
+
+
+def _overlaps(reader: "stac_reader.STACReader", tile: morecantile.Tile) -> bool:
+    bounds = reader.tms.bounds(tile)
+    return (
+        reader.bounds[0] <= bounds[2]
+        and reader.bounds[2] >= bounds[0]
+        and reader.bounds[1] <= bounds[3]
+        and reader.bounds[3] >= bounds[1]
+    )
+
+
+class TilePrefetcher:
+    """
+    Read tiles a map client is likely to request next into the read cache.
+
+    After a tile is served, its 8 neighbours, parent and 4 children are
+    read in the background (neighbours first) with the same options. The
+    number of queued or running prefetches is bounded by `max_pending`,
+    and prefetching is skipped (and pending prefetches cancelled) when the
+    asset read limiters or the memory budget are in use by requests.
+    Prefetches never wait for the memory budget, so they never delay or
+    reject requests.
+
+    Examples
+    --------
+    prefetcher = TilePrefetcher()
+    with STACReader(stac_path, prefetcher=prefetcher) as stac:
+        stac.tile(289, 207, 9, assets="B01")  # schedules 289/206/9, ...
+
+    Attributes
+    ----------
+    max_workers: int
+        Number of background threads.
+    max_pending: int
+        Maximum number of queued or running prefetches.
+    load_threshold: float
+        Skip prefetching when in-flight reads exceed this share of the limit.
+
+    """
+
+    def __init__(
+        self, max_workers: int = 2, max_pending: int = 32, load_threshold: float = 0.5
+    ):
+        """Initialize the background pool."""
+        self.max_pending = max_pending
+        self.load_threshold = load_threshold
+        self._executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._pending: Deque[futures.Future] = deque()
+        self._keys: Set = set()
+        self.scheduled = 0
+        self.skipped = 0
+        self.cancelled = 0
+
+    def overloaded(self) -> bool:
+        """Return True when reads use more than `load_threshold` of the limits."""
+        budget = stac_reader.MEMORY_BUDGET.metrics
+        if budget["max_size"] and (
+            budget["waiting"]
+            or budget["reserved"] > self.load_threshold * budget["max_size"]
+        ):
+            return True
+
+        return any(
+            limiter.in_flight > self.load_threshold * limiter.limit
+            for limiter in stac_reader.LIMITERS.values()
+        )
+
+    @staticmethod
+    def candidates(
+        tms: morecantile.TileMatrixSet, tile_x: int, tile_y: int, tile_z: int
+    ) -> Iterator[morecantile.Tile]:
+        """Yield neighbour, parent and children tiles (within the TMS)."""
+        tiles = [
+            (tile_x + dx, tile_y + dy, tile_z)
+            for dy in (-1, 0, 1)
+            for dx in (-1, 0, 1)
+            if dx or dy
+        ]
+        tiles.append((tile_x // 2, tile_y // 2, tile_z - 1))
+        tiles += [
+            (tile_x * 2 + dx, tile_y * 2 + dy, tile_z + 1)
+            for dy in (0, 1)
+            for dx in (0, 1)
+        ]
+
+        for x, y, z in tiles:
+            if not tms.minzoom <= z <= tms.maxzoom:
+                continue
+
+            matrix = tms.matrix(z)
+            if 0 <= x < matrix.matrixWidth and 0 <= y < matrix.matrixHeight:
+                yield morecantile.Tile(x, y, z)
+
+    def cancel(self):
+        """Cancel pending prefetches."""
+        with self._lock:
+            pending, self._pending = self._pending, deque()
+
+        # Cancelled futures call `_release`, which needs the lock
+        cancelled = sum(future.cancel() for future in pending)
+        with self._lock:
+            self.cancelled += cancelled
+
+    def schedule(
+        self,
+        reader: "stac_reader.STACReader",
+        tile_x: int,
+        tile_y: int,
+        tile_z: int,
+        **kwargs: Any,
+    ):
+        """Schedule prefetches around a served tile."""
+        if getattr(_LOCAL, "active", False) or not stac_reader.CACHE.enabled:
+            return
+
+        if self.overloaded():
+            with self._lock:
+                self.skipped += 1
+            self.cancel()
+            return
+
+        for tile in self.candidates(reader.tms, tile_x, tile_y, tile_z):
+            if not _overlaps(reader, tile):
+                continue
+
+            key = make_key(
+                reader.filepath,
+                reader.item.get("id"),
+                reader._version,
+                tile,
+                tuple(sorted(kwargs.items())),
+            )
+            with self._lock:
+                while self._pending and self._pending[0].done():
+                    self._pending.popleft()
+
+                if len(self._pending) >= self.max_pending:
+                    self.skipped += 1
+                    return
+
+                if key is None or key in self._keys:
+                    continue
+
+                self._keys.add(key)
+                future = self._executor.submit(self._prefetch, reader, tile, kwargs)
+                self._pending.append(future)
+                self.scheduled += 1
+
+            # Also called when the future is cancelled
+            future.add_done_callback(lambda _, key=key: self._release(key))
+
+    def _release(self, key: Hashable):
+        with self._lock:
+            self._keys.discard(key)
+
+    def _prefetch(
+        self, reader: "stac_reader.STACReader", tile: morecantile.Tile, kwargs: Dict
+    ):
+        if self.overloaded():
+            return
+
+        _LOCAL.active = True
+        try:
+            with stac_reader.MEMORY_BUDGET.nonblocking():
+                reader.tile(*tile, **kwargs)
+        except Exception:
+            # Prefetch errors are not reported, the tile will be read on request
+            pass
+        finally:
+            _LOCAL.active = False
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = True):
+        """Stop the background pool, cancelling pending prefetches by default."""
+        if cancel_futures:
+            self.cancel()
+        self._executor.shutdown(wait=wait)
@@ -4,22 +4,50 @@ import functools
 import json
 import multiprocessing
 import os
-import re
+import threading
+from collections import OrderedDict
 from concurrent import futures
 from dataclasses import dataclass, field
-from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 from urllib.parse import urlparse
 
 import morecantile
-import numexpr
 import numpy
+import rasterio
 import requests
 
 from rio_tiler.errors import InvalidBandName
 from rio_tiler_crs import COGReader
 
+from .assets import get_asset_index
+from .cache import ArrayCache
+from .concurrency import (
+    AdaptiveLimiter,
+    MemoryBudget,
+    SingleFlight,
+    get_backend,
+    make_key,
+)
+from .expression import ExpressionPlan
+from .render import Range
+from .render import render as _render
+from .shared import SharedCache
 from .utils import s3_get_object
 
+if TYPE_CHECKING:
+    from .prefetch import TilePrefetcher
+
 TMS = morecantile.tms.get("WebMercatorQuad")
 MAX_THREADS = int(os.environ.get("MAX_THREADS", multiprocessing.cpu_count() * 5))
 DEFAULT_VALID_TYPE = {
@@ -33,62 +61,96 @@ DEFAULT_VALID_TYPE = {
     "application/x-hdf",
 }
 
+# Concurrent identical asset reads (same href, method and options) share one request
+SINGLE_FLIGHT = SingleFlight()
+
+# GDAL caches of the bytes read from COGs: VSI_CACHE keeps the byte ranges read
+# through a dataset, CPL_VSIL_CURL_CACHE_SIZE the HTTP/S3 chunks read by any
+# dataset of the process, and GDAL_CACHEMAX (in MB) the decoded blocks
+GDAL_CONFIG = {
+    "VSI_CACHE": os.environ.get("VSI_CACHE", "TRUE"),
+    "VSI_CACHE_SIZE": int(os.environ.get("VSI_CACHE_SIZE", 25 * 1024 ** 2)),
+    "CPL_VSIL_CURL_CACHE_SIZE": int(
+        os.environ.get("CPL_VSIL_CURL_CACHE_SIZE", 128 * 1024 ** 2)
+    ),
+    "GDAL_CACHEMAX": int(os.environ.get("GDAL_CACHEMAX", 256)),
+}
 
-def _apply_expression(
-    blocks: Sequence[str], bands: Sequence[str], data: numpy.ndarray
-) -> numpy.ndarray:
-    """Apply rio-tiler expression."""
-    data = dict(zip(bands, data))
-    return numpy.array(
-        [
-            numpy.nan_to_num(numexpr.evaluate(bloc.strip(), local_dict=data))
-            for bloc in blocks
-        ]
-    )
+# Decoded tile/part/preview results (not byte ranges, see GDAL_CONFIG), keyed by
+# href + item `updated` + read options. Reads of items without `updated` are not
+# cached (disabled by default)
+CACHE = ArrayCache(
+    max_size=int(os.environ.get("CACHE_MAX_SIZE", 0)),
+    directory=os.environ.get("CACHE_DIRECTORY"),
+    max_disk_size=int(os.environ.get("CACHE_DIRECTORY_MAX_SIZE", 0)),
+)
+CACHED_METHODS = {"tile", "part", "preview"}
+
+# In-flight asset reads per storage backend, adapted from observed latency and errors.
+# MAX_THREADS is the upper bound.
+LIMITERS = {
+    "local": AdaptiveLimiter(
+        initial=min(multiprocessing.cpu_count(), MAX_THREADS), max_limit=MAX_THREADS
+    ),
+    "http": AdaptiveLimiter(initial=min(16, MAX_THREADS), max_limit=MAX_THREADS),
+    "s3": AdaptiveLimiter(initial=min(16, MAX_THREADS), max_limit=MAX_THREADS),
+}
+
+# Item JSON and COG info shared between processes (e.g. pre-fork server workers)
+SHARED_CACHE = SharedCache(
+    directory=os.environ.get("SHARED_CACHE_DIRECTORY"),
+    max_size=int(os.environ.get("SHARED_CACHE_MAX_SIZE", 0)),
+    ttl=float(os.environ.get("SHARED_CACHE_TTL", 300)),
+)
+SHARED_METHODS = {"info", "header"}
+
+# COG headers (size, band count, data type, nodata), by href and item version
+_HEADERS: "OrderedDict[Hashable, Dict]" = OrderedDict()
+_HEADERS_SIZE = 1024
+_HEADERS_LOCK = threading.Lock()
+
+# Estimated peak memory of concurrent tile/part/preview requests (0 to disable)
+MEMORY_BUDGET = MemoryBudget(
+    max_size=int(os.environ.get("MEMORY_BUDGET", 0)),
+    timeout=float(os.environ.get("MEMORY_BUDGET_TIMEOUT", 30)),
+)
+
+
+def _cog_header(dataset: Any) -> Dict:
+    """Return a COG header summary."""
+    return {
+        "width": dataset.width,
+        "height": dataset.height,
+        "count": dataset.count,
+        "dtype": dataset.dtypes[0],
+        "nodata": dataset.nodata,
+    }
 
 
 @functools.lru_cache(maxsize=512)
 def fetch(filepath: str) -> Dict:
     """Fetch items."""
+    if SHARED_CACHE.enabled:
+        item = SHARED_CACHE.get(("item", filepath))
+        if item is not None:
+            return item
+
     parsed = urlparse(filepath)
     if parsed.scheme == "s3":
         bucket = parsed.netloc
         key = parsed.path.strip("/")
-        return json.loads(s3_get_object(bucket, key))
+        item = json.loads(s3_get_object(bucket, key))
 
     elif parsed.scheme in ["https", "http", "ftp"]:
-        return requests.get(filepath).json()
+        item = requests.get(filepath).json()
 
     else:
         with open(filepath, "r") as f:
-            return json.load(f)
+            item = json.load(f)
 
-
-def _get_assets(
-    item: Dict,
-    include: Optional[Set[str]] = None,
-    exclude: Optional[Set[str]] = None,
-    include_asset_types: Optional[Set[str]] = None,
-    exclude_asset_types: Optional[Set[str]] = None,
-) -> Iterator:
-    """Get Asset list."""
-    for asset, asset_info in item["assets"].items():
-        _type = asset_info["type"]
-
-        if exclude and asset in exclude:
-            continue
-
-        if (exclude_asset_types and _type in exclude_asset_types) or (
-            include and asset not in include
-        ):
-            continue
-
-        if (include_asset_types and _type not in include_asset_types) or (
-            include and asset not in include
-        ):
-            continue
-
-        yield asset
+    if SHARED_CACHE.enabled:
+        SHARED_CACHE.set(("item", filepath), item)
+    return item
 
 
 @dataclass
@@ -127,8 +189,12 @@ class STACReader:
         Exclude some assets.
     include_asset_types: Set, optional
         Only include some assets base on their type
-    include_asset_types: Set, optional
+    exclude_asset_types: Set, optional
         Exclude some assets base on their type
+    include_asset_roles: Set, optional
+        Only include some assets base on their roles
+    prefetcher: TilePrefetcher, optional
+        Prefetch tiles around the ones read with `tile`.
 
     Properties
     ----------
@@ -165,6 +231,8 @@ class STACReader:
     exclude_assets: Optional[Set[str]] = None
     include_asset_types: Set[str] = field(default_factory=lambda: DEFAULT_VALID_TYPE)
     exclude_asset_types: Optional[Set[str]] = None
+    include_asset_roles: Optional[Set[str]] = None
+    prefetcher: Optional["TilePrefetcher"] = None
 
     def __enter__(self):
         """Support using with Context Managers."""
@@ -173,15 +241,18 @@ class STACReader:
         # Get Zooms from proj: ?
         self.bounds: Tuple[float, float, float, float] = self.item["bbox"]
 
-        self.assets = list(
-            _get_assets(
-                self.item,
-                include=self.include_assets,
-                exclude=self.exclude_assets,
-                include_asset_types=self.include_asset_types,
-                exclude_asset_types=self.exclude_asset_types,
-            )
+        # Used to invalidate cached reads when the item is updated
+        self._version = self.item.get("properties", {}).get("updated")
+
+        self.index = get_asset_index(self.item)
+        assets, self._assets_set = self.index.select(
+            include=self.include_assets,
+            exclude=self.exclude_assets,
+            include_asset_types=self.include_asset_types,
+            exclude_asset_types=self.exclude_asset_types,
+            include_asset_roles=self.include_asset_roles,
         )
+        self.assets = list(assets)
 
         return self
 
@@ -192,16 +263,193 @@ class STACReader:
     def _get_href(self, assets: Sequence[str]) -> Sequence[str]:
         """Validate asset names and return asset's url."""
         for asset in assets:
-            if asset not in self.assets:
+            if asset not in self._assets_set:
                 raise InvalidBandName(f"{asset} is not a valid asset name.")
 
         return [self.item["assets"][asset]["href"] for asset in assets]
 
-    def _parse_expression(self, expression: str) -> Sequence[str]:
+    def _parse_expression(
+        self, expression: str, asset_expression: Optional[str] = "", **kwargs: Any
+    ) -> ExpressionPlan:
         """Parse rio-tiler band math expression."""
-        _re = re.compile("|".join(sorted(self.assets, reverse=True)))
-        assets = list(set(re.findall(_re, expression)))
-        return assets
+        return ExpressionPlan(
+            expression,
+            self._assets_set,
+            self.get_band_assets,
+            asset_expression=asset_expression,
+            indexes=kwargs.get("indexes"),
+            subset=lambda asset: self._subset_equivalent(asset, **kwargs),
+        )
+
+    def _subset_equivalent(self, asset: str, **kwargs: Any) -> bool:
+        """
+        Return True if reading some bands of an asset doesn't change their values.
+
+        With per-band nodata, pixels are masked when all the *read* bands are
+        nodata. Nodata comes from the asset `raster:bands` when declared, or
+        from the (cached) COG header.
+
+        """
+        if kwargs.get("nodata") is not None:
+            return False
+
+        if len(self.index.assets[asset].bands) == 1:
+            return True
+
+        bands = self.item["assets"][asset].get("raster:bands")
+        if bands:
+            return all("nodata" not in band for band in bands)
+
+        return self._header(self.item["assets"][asset]["href"])["nodata"] is None
+
+    def _header(self, href: str) -> Dict:
+        """Return the (cached) COG header of an asset url."""
+        key = (href, self._version)
+        with _HEADERS_LOCK:
+            header = _HEADERS.get(key)
+            if header is not None:
+                _HEADERS.move_to_end(key)
+                return header
+
+        header = self._read(href, "header")
+        with _HEADERS_LOCK:
+            _HEADERS[key] = header
+            while len(_HEADERS) > _HEADERS_SIZE:
+                _HEADERS.popitem(last=False)
+        return header
+
+    def get_band_assets(self, name: str) -> Sequence[Tuple[str, int]]:
+        """Return `(asset, band index)` for an `eo:bands` name or common name."""
+        return [
+            (asset, bidx)
+            for asset, bidx in self.index.get_band(name)
+            if asset in self._assets_set
+        ]
+
+    def _read(self, asset: str, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Call a COGReader method on one asset url, coalescing identical reads."""
+        key = make_key(
+            method,
+            asset,
+            self._version,
+            self.tms.identifier,
+            args,
+            tuple(sorted(kwargs.items())),
+        )
+        cached = (
+            key is not None
+            and self._version is not None
+            and method in CACHED_METHODS
+            and CACHE.enabled
+        )
+        if cached:
+            value = CACHE.get(key)
+            if value is not None:
+                return value
+
+        shared = key is not None and method in SHARED_METHODS and SHARED_CACHE.enabled
+        if shared:
+            value = SHARED_CACHE.get(key)
+            if value is not None:
+                return value
+
+        def _reader():
+            with LIMITERS[get_backend(asset)].slot(kind=method), rasterio.Env(
+                **GDAL_CONFIG
+            ), COGReader(asset, tms=self.tms) as cog:
+                if method == "info":
+                    value = cog.info
+                elif method == "header":
+                    value = _cog_header(cog.dataset)
+                else:
+                    value = getattr(cog, method)(*args, **kwargs)
+
+            if cached:
+                CACHE.set(key, value)
+            if shared:
+                SHARED_CACHE.set(key, value)
+            return value
+
+        return SINGLE_FLIGHT.do(key, _reader)
+
+    def _asset_header(self, asset: str) -> Dict:
+        """Return asset size, band count and data type, from STAC or its COG header."""
+        info = self.item["assets"][asset]
+        shape = info.get("proj:shape")
+        count = len(self.index.assets[asset].bands) or len(info.get("raster:bands", []))
+        dtype = (info.get("raster:bands") or [{}])[0].get("data_type")
+        if shape and count and dtype:
+            return {
+                "height": shape[0],
+                "width": shape[1],
+                "count": count,
+                "dtype": dtype,
+            }
+
+        header = self._header(info["href"])
+        return {
+            "height": shape[0] if shape else header["height"],
+            "width": shape[1] if shape else header["width"],
+            "count": count or header["count"],
+            "dtype": dtype or header["dtype"],
+        }
+
+    def _estimate_size(
+        self,
+        assets: Sequence[str],
+        pixels: int,
+        plan: Optional[ExpressionPlan] = None,
+        asset_expression: Optional[str] = "",
+        **kwargs: Any,
+    ) -> int:
+        """
+        Estimate the peak memory (in bytes) of reading `pixels` from assets.
+
+        Band counts and data types missing from the STAC item come from the
+        COG headers, so nothing is estimated (0) without a memory budget.
+
+        """
+        if not MEMORY_BUDGET.max_size:
+            return 0
+
+        indexes = kwargs.get("indexes")
+        nbytes = 0
+        for ix, asset in enumerate(assets):
+            header = self._asset_header(asset)
+            if plan and plan.asset_indexes and plan.asset_indexes[ix] is not None:
+                count = len(plan.asset_indexes[ix])
+            elif asset_expression:
+                count = len(asset_expression.split(","))
+            elif indexes is not None:
+                count = 1 if isinstance(indexes, int) else len(indexes)
+            else:
+                count = header["count"]
+
+            # data + mask
+            nbytes += pixels * (count * numpy.dtype(header["dtype"]).itemsize + 1)
+
+        # per-asset arrays + concatenated data and mask
+        nbytes = 2 * nbytes + pixels
+        if plan:
+            # selected rows + expression blocks + output array, as float64
+            nbytes += (len(plan.variables) + 2 * len(plan.blocks)) * pixels * 8
+
+        return nbytes
+
+    def _full_pixels(
+        self, bbox: Tuple[float, float, float, float], assets: Sequence[str]
+    ) -> int:
+        """Estimate the number of pixels of a full resolution part of assets."""
+        if not MEMORY_BUDGET.max_size:
+            return 0
+
+        headers = [self._asset_header(asset) for asset in assets]
+        width = min(bbox[2], self.bounds[2]) - max(bbox[0], self.bounds[0])
+        height = min(bbox[3], self.bounds[3]) - max(bbox[1], self.bounds[1])
+        fraction = (max(width, 0) * max(height, 0)) / (
+            (self.bounds[2] - self.bounds[0]) * (self.bounds[3] - self.bounds[1])
+        )
+        return int(max(h["height"] * h["width"] for h in headers) * fraction)
 
     @property
     def center(self) -> Tuple[float, float, int]:
@@ -213,19 +461,25 @@ class STACReader:
         )
 
     def _tile(
-        self, assets: Sequence[str], *args: Any, **kwargs: Any
+        self,
+        assets: Sequence[str],
+        *args: Any,
+        plan: Optional[ExpressionPlan] = None,
+        **kwargs: Any,
     ) -> Tuple[numpy.ndarray, numpy.ndarray]:
         """Assemble multiple rio_tiler.reader.tile."""
 
-        def worker(asset: str):
-            with COGReader(asset, tms=self.tms) as cog:
-                return cog.tile(*args, **kwargs)
+        def worker(asset: str, indexes: Optional[Tuple[int, ...]]):
+            options = dict(kwargs, indexes=indexes) if indexes else kwargs
+            return self._read(asset, "tile", *args, **options)
 
+        asset_indexes = (plan and plan.asset_indexes) or [None] * len(assets)
         with futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-            data, masks = zip(*list(executor.map(worker, assets)))
-            data = numpy.concatenate(data)
+            data, masks = zip(*list(executor.map(worker, assets, asset_indexes)))
             mask = numpy.all(masks, axis=0).astype(numpy.uint8) * 255
-            return data, mask
+            if plan:
+                return plan.apply(data), mask
+            return numpy.concatenate(data), mask
 
     def tile(
         self,
@@ -244,8 +498,10 @@ class STACReader:
         if isinstance(assets, str):
             assets = (assets,)
 
+        plan = None
         if expression:
-            assets = self._parse_expression(expression)
+            plan = self._parse_expression(expression, asset_expression, **kwargs)
+            assets = plan.assets
 
         if not assets:
             raise Exception(
@@ -253,30 +509,77 @@ class STACReader:
             )
 
         asset_urls = self._get_href(assets)
-        data, mask = self._tile(
-            asset_urls, tile_x, tile_y, tile_z, expression=asset_expression, **kwargs,
+        nbytes = self._estimate_size(
+            assets, tilesize * tilesize, plan, asset_expression, **kwargs
         )
+        with MEMORY_BUDGET.reserve(nbytes):
+            data, mask = self._tile(
+                asset_urls,
+                tile_x,
+                tile_y,
+                tile_z,
+                plan=plan,
+                expression=asset_expression,
+                **kwargs,
+            )
 
-        if expression:
-            blocks = expression.split(",")
-            data = _apply_expression(blocks, assets, data)
+        if self.prefetcher:
+            self.prefetcher.schedule(
+                self,
+                tile_x,
+                tile_y,
+                tile_z,
+                tilesize=tilesize,
+                assets=None if plan else tuple(assets),
+                expression=expression,
+                asset_expression=asset_expression,
+                **kwargs,
+            )
 
         return data, mask
 
+    def render(
+        self,
+        tile_x: int,
+        tile_y: int,
+        tile_z: int,
+        img_format: str = "PNG",
+        in_range: Optional[Union[Range, Sequence[Range]]] = None,
+        colormap: Optional[Dict] = None,
+        creation_options: Optional[Dict] = None,
+        **kwargs: Any,
+    ) -> bytes:
+        """Read a TMS map tile from COGs and encode it to an image."""
+        data, mask = self.tile(tile_x, tile_y, tile_z, **kwargs)
+        return _render(
+            data,
+            mask,
+            img_format=img_format,
+            in_range=in_range,
+            colormap=colormap,
+            **(creation_options or {}),
+        )
+
     def _part(
-        self, assets: Sequence[str], *args: Any, **kwargs: Any
+        self,
+        assets: Sequence[str],
+        *args: Any,
+        plan: Optional[ExpressionPlan] = None,
+        **kwargs: Any,
     ) -> Tuple[numpy.ndarray, numpy.ndarray]:
         """Assemble multiple COGReader.part."""
 
-        def worker(asset: str):
-            with COGReader(asset) as cog:
-                return cog.part(*args, **kwargs)
+        def worker(asset: str, indexes: Optional[Tuple[int, ...]]):
+            options = dict(kwargs, indexes=indexes) if indexes else kwargs
+            return self._read(asset, "part", *args, **options)
 
+        asset_indexes = (plan and plan.asset_indexes) or [None] * len(assets)
         with futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-            data, masks = zip(*list(executor.map(worker, assets)))
-            data = numpy.concatenate(data)
+            data, masks = zip(*list(executor.map(worker, assets, asset_indexes)))
             mask = numpy.all(masks, axis=0).astype(numpy.uint8) * 255
-            return data, mask
+            if plan:
+                return plan.apply(data), mask
+            return numpy.concatenate(data), mask
 
     def part(
         self,
@@ -293,8 +596,10 @@ class STACReader:
         if isinstance(assets, str):
             assets = (assets,)
 
+        plan = None
         if expression:
-            assets = self._parse_expression(expression)
+            plan = self._parse_expression(expression, asset_expression, **kwargs)
+            assets = plan.assets
 
         if not assets:
             raise Exception(
@@ -302,30 +607,46 @@ class STACReader:
             )
 
         asset_urls = self._get_href(assets)
-        data, mask = self._part(
-            asset_urls, bbox, max_size=max_size, expression=asset_expression, **kwargs
-        )
-
-        if expression:
-            blocks = expression.split(",")
-            data = _apply_expression(blocks, assets, data)
+        if kwargs.get("height") and kwargs.get("width"):
+            pixels = kwargs["height"] * kwargs["width"]
+        elif max_size:
+            pixels = max_size * max_size
+        else:
+            pixels = self._full_pixels(bbox, assets)
+
+        nbytes = self._estimate_size(assets, pixels, plan, asset_expression, **kwargs)
+        with MEMORY_BUDGET.reserve(nbytes):
+            data, mask = self._part(
+                asset_urls,
+                bbox,
+                max_size=max_size,
+                plan=plan,
+                expression=asset_expression,
+                **kwargs,
+            )
 
         return data, mask
 
     def _preview(
-        self, assets: Sequence[str], *args: Any, **kwargs: Any
+        self,
+        assets: Sequence[str],
+        *args: Any,
+        plan: Optional[ExpressionPlan] = None,
+        **kwargs: Any,
     ) -> Tuple[numpy.ndarray, numpy.ndarray]:
         """Assemble multiple COGReader.preview."""
 
-        def worker(asset: str):
-            with COGReader(asset) as cog:
-                return cog.preview(*args, **kwargs)
+        def worker(asset: str, indexes: Optional[Tuple[int, ...]]):
+            options = dict(kwargs, indexes=indexes) if indexes else kwargs
+            return self._read(asset, "preview", *args, **options)
 
+        asset_indexes = (plan and plan.asset_indexes) or [None] * len(assets)
         with futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-            data, masks = zip(*list(executor.map(worker, assets)))
-            data = numpy.concatenate(data)
+            data, masks = zip(*list(executor.map(worker, assets, asset_indexes)))
             mask = numpy.all(masks, axis=0).astype(numpy.uint8) * 255
-            return data, mask
+            if plan:
+                return plan.apply(data), mask
+            return numpy.concatenate(data), mask
 
     def preview(
         self,
@@ -340,8 +661,10 @@ class STACReader:
         if isinstance(assets, str):
             assets = (assets,)
 
+        plan = None
         if expression:
-            assets = self._parse_expression(expression)
+            plan = self._parse_expression(expression, asset_expression, **kwargs)
+            assets = plan.assets
 
         if not assets:
             raise Exception(
@@ -349,23 +672,37 @@ class STACReader:
             )
 
         asset_urls = self._get_href(assets)
-        data, mask = self._preview(asset_urls, expression=asset_expression, **kwargs)
-
-        if expression:
-            blocks = expression.split(",")
-            data = _apply_expression(blocks, assets, data)
+        if kwargs.get("height") and kwargs.get("width"):
+            pixels = kwargs["height"] * kwargs["width"]
+        elif kwargs.get("max_size", 1024):
+            pixels = kwargs.get("max_size", 1024) ** 2
+        else:
+            pixels = self._full_pixels(self.bounds, assets)
+
+        nbytes = self._estimate_size(assets, pixels, plan, asset_expression, **kwargs)
+        with MEMORY_BUDGET.reserve(nbytes):
+            data, mask = self._preview(
+                asset_urls, plan=plan, expression=asset_expression, **kwargs,
+            )
 
         return data, mask
 
-    def _point(self, assets: Sequence[str], *args: Any, **kwargs: Any) -> List:
+    def _point(
+        self,
+        assets: Sequence[str],
+        *args: Any,
+        asset_indexes: Optional[Sequence[Tuple[int, ...]]] = None,
+        **kwargs: Any,
+    ) -> List:
         """Assemble multiple COGReader.point."""
 
-        def worker(asset: str) -> List:
-            with COGReader(asset) as cog:
-                return cog.point(*args, **kwargs)
+        def worker(asset: str, indexes: Optional[Tuple[int, ...]]) -> List:
+            options = dict(kwargs, indexes=indexes) if indexes else kwargs
+            return self._read(asset, "point", *args, **options)
 
+        asset_indexes = asset_indexes or [None] * len(assets)
         with futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-            return list(executor.map(worker, assets))
+            return list(executor.map(worker, assets, asset_indexes))
 
     def point(
         self,
@@ -382,8 +719,10 @@ class STACReader:
         if isinstance(assets, str):
             assets = (assets,)
 
+        plan = None
         if expression:
-            assets = self._parse_expression(expression)
+            plan = self._parse_expression(expression, asset_expression, **kwargs)
+            assets = plan.assets
 
         if not assets:
             raise Exception(
@@ -391,11 +730,17 @@ class STACReader:
             )
 
         asset_urls = self._get_href(assets)
-        point = self._point(asset_urls, lon, lat, expression=asset_expression, **kwargs)
+        point = self._point(
+            asset_urls,
+            lon,
+            lat,
+            asset_indexes=plan.asset_indexes if plan else None,
+            expression=asset_expression,
+            **kwargs,
+        )
 
-        if expression:
-            blocks = expression.split(",")
-            point = _apply_expression(blocks, assets, point).tolist()
+        if plan:
+            point = plan.apply([numpy.asarray(p)[:, None] for p in point]).tolist()
 
         return point
 
@@ -403,8 +748,7 @@ class STACReader:
         """Assemble multiple COGReader.stats."""
 
         def worker(asset: str) -> Dict:
-            with COGReader(asset) as cog:
-                return cog.stats(*args, **kwargs)
+            return self._read(asset, "stats", *args, **kwargs)
 
         with futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
             return list(executor.map(worker, assets))
@@ -429,8 +773,7 @@ class STACReader:
         """Assemble multiple COGReader.stats."""
 
         def worker(asset: str) -> Dict:
-            with COGReader(asset, tms=self.tms) as cog:
-                return cog.info
+            return self._read(asset, "info")
 
         with futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
             return list(executor.map(worker, assets))
@@ -449,8 +792,7 @@ class STACReader:
         """Assemble multiple COGReader.stats."""
 
         def worker(asset: str) -> Dict:
-            with COGReader(asset) as cog:
-                return cog.metadata(*args, **kwargs)
+            return self._read(asset, "metadata", *args, **kwargs)
 
         with futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
             return list(executor.map(worker, assets))
@@ -0,0 +1,150 @@
+"""stac_tiler.render: fused tile rescaling, colormap and encoding."""
+
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy
+from rasterio.io import MemoryFile
+
+from rio_tiler.colormap import make_lut
+
+Range = Tuple[float, float]
+DRIVERS = {"JPG": "JPEG", "TIF": "GTiff", "TIFF": "GTiff"}
+
+
+def _ranges(
+    data: numpy.ndarray, in_range: Optional[Union[Range, Sequence[Range]]]
+) -> Sequence[Optional[Range]]:
+    """Return a (min, max) input range per band (None when no rescaling is needed)."""
+    count = data.shape[0]
+    if in_range is None:
+        if data.dtype == numpy.uint8:
+            return [None] * count
+
+        if numpy.issubdtype(data.dtype, numpy.integer):
+            info = numpy.iinfo(data.dtype)
+            return [(info.min, info.max)] * count
+
+        return [(0, 255)] * count
+
+    if numpy.isscalar(in_range[0]):
+        return [tuple(in_range)] * count
+
+    if len(in_range) != count:
+        raise ValueError(
+            f"Got {len(in_range)} input ranges for {count} bands, "
+            "pass one range per band or a single (min, max) range."
+        )
+
+    return [tuple(band_range) for band_range in in_range]
+
+
+def to_uint8(
+    data: numpy.ndarray,
+    mask: Optional[numpy.ndarray] = None,
+    in_range: Optional[Union[Range, Sequence[Range]]] = None,
+    colormap: Optional[Dict] = None,
+) -> numpy.ndarray:
+    """
+    Rescale, colormap and mask data into one uint8 (band, y, x) image.
+
+    Bands are linearly rescaled from `in_range` (one (min, max) for all
+    bands or one per band) to 0-255, one band at a time through a single
+    float32 buffer. A colormap (GDAL RGBA Color Table dict) turns a 1 band
+    image into RGBA, with the alpha band combined with the mask. Otherwise
+    the mask is appended as an alpha band.
+
+    Default `in_range` is the data type range for integers and (0, 255) for
+    floats (uint8 data is not rescaled).
+
+    """
+    count, height, width = data.shape
+    if colormap and count != 1:
+        raise ValueError("Colormap can only be applied to 1 band data.")
+
+    out_count = count + 1 if mask is not None and not colormap else count
+    image = numpy.empty((out_count, height, width), dtype=numpy.uint8)
+
+    buffer = None
+    for bidx, band_range in enumerate(_ranges(data, in_range)):
+        if band_range is None:
+            image[bidx] = data[bidx]
+            continue
+
+        if buffer is None:
+            buffer = numpy.empty((height, width), dtype=numpy.float32)
+
+        vmin, vmax = band_range
+        scale = 255.0 / (vmax - vmin) if vmax != vmin else 0.0
+        numpy.subtract(data[bidx], vmin, out=buffer, casting="unsafe")
+        numpy.multiply(buffer, scale, out=buffer)
+        numpy.clip(buffer, 0, 255, out=buffer)
+        numpy.rint(buffer, out=buffer)
+        numpy.nan_to_num(buffer, copy=False)
+        image[bidx] = buffer
+
+    if colormap:
+        rgba = numpy.empty((4, height, width), dtype=numpy.uint8)
+        numpy.take(make_lut(colormap).T, image[0], axis=1, out=rgba)
+        if mask is not None:
+            numpy.minimum(rgba[3], mask, out=rgba[3])
+        return rgba
+
+    if mask is not None:
+        image[-1] = mask
+
+    return image
+
+
+def encode(
+    image: numpy.ndarray,
+    img_format: str = "PNG",
+    alpha: bool = False,
+    **creation_options: Any,
+) -> bytes:
+    """
+    Encode a uint8 (band, y, x) image with GDAL (which releases the GIL).
+
+    When `alpha` is True, the last band is an alpha band (dropped for JPEG).
+    """
+    img_format = img_format.upper()
+    driver = DRIVERS.get(img_format, img_format)
+
+    if alpha and driver == "JPEG":
+        image = image[:-1]
+        alpha = False
+
+    # WEBP only supports RGB and RGBA
+    if driver == "WEBP" and image.shape[0] - int(alpha) == 1:
+        image = image[[0, 0, 0, 1] if alpha else [0, 0, 0]]
+
+    count, height, width = image.shape
+    with MemoryFile() as memfile:
+        with memfile.open(
+            driver=driver,
+            dtype=image.dtype,
+            count=count,
+            height=height,
+            width=width,
+            **creation_options,
+        ) as dst:
+            dst.write(image)
+
+        return memfile.read()
+
+
+def render(
+    data: numpy.ndarray,
+    mask: Optional[numpy.ndarray] = None,
+    img_format: str = "PNG",
+    in_range: Optional[Union[Range, Sequence[Range]]] = None,
+    colormap: Optional[Dict] = None,
+    **creation_options: Any,
+) -> bytes:
+    """Rescale, colormap, mask and encode data to an image."""
+    image = to_uint8(data, mask, in_range=in_range, colormap=colormap)
+    return encode(
+        image,
+        img_format=img_format,
+        alpha=mask is not None or bool(colormap),
+        **creation_options,
+    )
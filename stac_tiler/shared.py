@@ -0,0 +1,175 @@
+"""stac_tiler.shared: cross-process cache of item and asset metadata."""
+
+import hashlib
+import marshal
+import mmap
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+from .cache import scan_entries
+
+PLAIN_TYPES = (str, int, float, bool, type(None))
+
+
+def _is_plain(value: Any) -> bool:
+    """Return True if value only holds plain Python types."""
+    if isinstance(value, PLAIN_TYPES):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_plain(v) for v in value)
+    if isinstance(value, dict):
+        return all(_is_plain(k) and _is_plain(v) for k, v in value.items())
+    return False
+
+
+class SharedCache:
+    """
+    Cache of plain Python values (STAC items, COG info) shared between processes.
+
+    Each entry is one `marshal` serialized file in `directory`, written
+    atomically and decoded directly from a memory map, so processes of a
+    pre-fork server (e.g. gunicorn workers) warm a single cache. Use a
+    directory on a memory filesystem (e.g. `/dev/shm/stac-tiler`) to keep
+    entries in shared memory.
+
+    Only values made of dicts, lists, tuples, strings, numbers, booleans and
+    None are cached (other values are silently skipped). Entries expire
+    after `ttl` seconds, and the whole directory is bounded by `max_size`
+    bytes: it is scanned after every `max_size / 16` bytes written (or every
+    `ttl` seconds) by a process, and expired then oldest entries are removed.
+
+    `marshal` is not safe against tampered files: the directory is created
+    readable and writable by its owner only, and must not be writable by
+    other users.
+
+    Examples
+    --------
+    cache = SharedCache("/dev/shm/stac-tiler", max_size=64 * 1024 ** 2)
+    cache.set(("item", "s3://bucket/item.json"), item)
+    cache.get(("item", "s3://bucket/item.json"))
+
+    Attributes
+    ----------
+    directory: str, optional
+        Cache directory, None disables the cache.
+    max_size: int
+        Budget in bytes for the whole directory, 0 means unbounded.
+    ttl: float
+        Entries older than `ttl` seconds are ignored, 0 means no expiry.
+
+    """
+
+    def __init__(
+        self, directory: Optional[str] = None, max_size: int = 0, ttl: float = 300
+    ):
+        """Initialize the cache directory."""
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._written = 0
+        self._pruned_at = time.monotonic()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        if self.directory:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if the cache has a directory."""
+        return bool(self.directory)
+
+    def _path(self, key: Hashable) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.marshal")
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key or None."""
+        value = None
+        try:
+            with open(self._path(key), "rb") as f:
+                if (
+                    not self.ttl
+                    or time.time() - os.fstat(f.fileno()).st_mtime < self.ttl
+                ):
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                        value = marshal.loads(buffer)
+        except (OSError, ValueError, EOFError, TypeError):
+            value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Add a value to the cache."""
+        # marshal also serializes buffers (e.g. numpy arrays) as bytes
+        if not _is_plain(value):
+            return
+
+        data = marshal.dumps(value)
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # Readers never see partial entries
+        os.replace(tmp, self._path(key))
+
+        with self._lock:
+            self._written += len(data)
+            prune = (self.max_size and self._written > self.max_size / 16) or (
+                self.ttl and time.monotonic() - self._pruned_at > self.ttl
+            )
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Remove expired entries, then the oldest ones over the budget."""
+        if not self._prune_lock.acquire(blocking=False):
+            return  # Another thread is pruning
+
+        try:
+            expired = time.time() - self.ttl if self.ttl else None
+            entries = scan_entries(self.directory)
+            size = sum(entry_size for _, entry_size, _ in entries)
+            for mtime, entry_size, paths in entries:
+                if (expired is None or mtime >= expired) and (
+                    not self.max_size or size <= self.max_size
+                ):
+                    break
+
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                size -= entry_size
+
+            with self._lock:
+                self.size = size
+                self._written = 0
+                self._pruned_at = time.monotonic()
+        finally:
+            self._prune_lock.release()
+
+    @property
+    def metrics(self) -> Dict:
+        """Return cache usage counters (size as of the last prune)."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
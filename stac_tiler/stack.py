@@ -0,0 +1,355 @@
+"""stac_tiler.stack: time-series reads over many STAC items."""
+
+import abc
+from concurrent import futures
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+import morecantile
+import numpy
+
+from rio_tiler.errors import TileOutsideBounds
+
+from .reader import MAX_THREADS, TMS, STACReader
+
+
+class Reducer(abc.ABC):
+    """
+    Temporal reducer, fed one date at a time (in item order).
+
+    Reducers only keep their running state, not the whole stack.
+    """
+
+    def __init__(self):
+        """Initialize the state."""
+        self.data: Optional[numpy.ndarray] = None
+        self.mask: Optional[numpy.ndarray] = None
+
+    def update(self, data: numpy.ndarray, mask: numpy.ndarray):
+        """Add one date."""
+        if self.mask is None:
+            self._start(data, mask > 0)
+            self.mask = mask.copy()
+        else:
+            self._update(data, mask > 0)
+            self.mask = numpy.maximum(self.mask, mask)
+
+    def _start(self, data: numpy.ndarray, valid: numpy.ndarray):
+        self.data = data.copy()
+
+    @abc.abstractmethod
+    def _update(self, data: numpy.ndarray, valid: numpy.ndarray):
+        """Add a date after the first one."""
+
+    def result(self) -> Tuple[Optional[numpy.ndarray], Optional[numpy.ndarray]]:
+        """Return the reduced data and mask (None if no date was added)."""
+        return self.data, self.mask
+
+
+class LatestValid(Reducer):
+    """Keep the latest valid value of each pixel."""
+
+    def _update(self, data: numpy.ndarray, valid: numpy.ndarray):
+        self.data[:, valid] = data[:, valid]
+
+
+class Max(Reducer):
+    """Keep the maximum valid value of each pixel and band."""
+
+    def _update(self, data: numpy.ndarray, valid: numpy.ndarray):
+        better = valid & ((self.mask == 0) | (data > self.data))
+        self.data[better] = data[better]
+
+
+class ArgMax(Reducer):
+    """Keep all bands of the date maximizing one band (e.g. max-NDVI composite)."""
+
+    def __init__(self, band: int = 0):
+        """Set the band to maximize."""
+        super().__init__()
+        self.band = band
+
+    def _update(self, data: numpy.ndarray, valid: numpy.ndarray):
+        key = self.data[self.band]
+        better = valid & ((self.mask == 0) | (data[self.band] > key))
+        self.data[:, better] = data[:, better]
+
+
+class Mean(Reducer):
+    """Average valid values of each pixel."""
+
+    def __init__(self):
+        """Initialize the state."""
+        super().__init__()
+        self.count: Optional[numpy.ndarray] = None
+
+    def _start(self, data: numpy.ndarray, valid: numpy.ndarray):
+        self.data = numpy.zeros(data.shape, dtype="float64")
+        self.count = numpy.zeros(valid.shape, dtype="uint32")
+        self._update(data, valid)
+
+    def _update(self, data: numpy.ndarray, valid: numpy.ndarray):
+        self.data[:, valid] += data[:, valid]
+        self.count += valid
+
+    def result(self) -> Tuple[Optional[numpy.ndarray], Optional[numpy.ndarray]]:
+        """Return the reduced data and mask (None if no date was added)."""
+        if self.data is None:
+            return None, None
+
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            data = numpy.nan_to_num(self.data / self.count)
+        return data, self.mask
+
+
+class Median(Reducer):
+    """
+    Approximate median of valid values of each pixel (remedian).
+
+    Valid values are buffered by groups of `base` per pixel, and a full group
+    is replaced by its median in the buffer of the next level, so memory
+    grows with `base * log(dates, base)` instead of the number of dates. The
+    result is the median of the buffered values, weighted by their level:
+    exact up to `base` valid dates per pixel, approximate beyond.
+
+    Rousseeuw & Bassett, "The remedian: a robust averaging method for large
+    data sets", JASA (1990).
+
+    """
+
+    def __init__(self, base: int = 9):
+        """Set the number of values per group."""
+        super().__init__()
+        self.base = base
+        self.levels: List[numpy.ndarray] = []
+        self.counts: List[numpy.ndarray] = []
+
+    def _start(self, data: numpy.ndarray, valid: numpy.ndarray):
+        self._update(data, valid)
+
+    def _update(self, data: numpy.ndarray, valid: numpy.ndarray):
+        self._push(0, data, valid)
+
+    def _push(self, level: int, data: numpy.ndarray, valid: numpy.ndarray):
+        if level == len(self.levels):
+            dtype = numpy.result_type(data.dtype, numpy.float32)
+            self.levels.append(numpy.full((self.base,) + data.shape, numpy.nan, dtype))
+            self.counts.append(numpy.zeros(valid.shape, dtype="uint32"))
+
+        values, count = self.levels[level], self.counts[level]
+        rows, cols = numpy.nonzero(valid)
+        values[count[rows, cols], :, rows, cols] = data[:, rows, cols].T
+        count[rows, cols] += 1
+
+        rows, cols = numpy.nonzero(count == self.base)
+        if rows.size:
+            medians = numpy.median(values[:, :, rows, cols], axis=0)
+            values[:, :, rows, cols] = numpy.nan
+            count[rows, cols] = 0
+
+            full = numpy.zeros(valid.shape, dtype="bool")
+            full[rows, cols] = True
+            data = numpy.zeros(data.shape, dtype=values.dtype)
+            data[:, rows, cols] = medians
+            self._push(level + 1, data, full)
+
+    def result(self) -> Tuple[Optional[numpy.ndarray], Optional[numpy.ndarray]]:
+        """Return the reduced data and mask (None if no date was added)."""
+        if self.mask is None:
+            return None, None
+
+        values = numpy.concatenate(self.levels)
+        order = numpy.argsort(values, axis=0)  # empty (nan) slots last
+        values = numpy.take_along_axis(values, order, axis=0)
+
+        weights = numpy.repeat(
+            [self.base ** level for level in range(len(self.levels))], self.base
+        )
+        weights = numpy.where(numpy.isnan(values), 0, weights[order])
+        cumulative = numpy.cumsum(weights, axis=0)
+        half = cumulative[-1] / 2
+
+        # Average the middle values, like numpy.median for an even count
+        lower = numpy.take_along_axis(
+            values, numpy.argmax(cumulative >= half, axis=0)[None], axis=0
+        )
+        upper = numpy.take_along_axis(
+            values, numpy.argmax(cumulative > half, axis=0)[None], axis=0
+        )
+        data = numpy.nan_to_num((lower[0] + upper[0]) / 2)
+        return data, self.mask
+
+
+REDUCERS: Dict[str, Type[Reducer]] = {
+    "latest": LatestValid,
+    "max": Max,
+    "argmax": ArgMax,
+    "mean": Mean,
+    "median": Median,
+}
+
+
+def _contains(bounds: Sequence[float], lon: float, lat: float) -> bool:
+    return bounds[0] <= lon <= bounds[2] and bounds[1] <= lat <= bounds[3]
+
+
+@dataclass
+class TimeStackReader:
+    """
+    Read the same tile or point from an ordered set of STAC items.
+
+    Dates are read concurrently (by groups of `max_dates` to bound memory)
+    and share the STACReader read cache, coalescing and concurrency limits.
+
+    Examples
+    --------
+    with TimeStackReader(["2020-01.json", "2020-02.json"]) as stack:
+        times, data, mask = stack.tile(289, 207, 9, assets="B04")
+
+    with TimeStackReader(items) as stack:
+        data, mask = stack.tile(
+            289, 207, 9, expression="(B08-B04)/(B08+B04)", reducer="max"
+        )
+
+    Attributes
+    ----------
+    items: list
+        STAC items (dicts, paths or URLs), in time order.
+    tms: morecantile.TileMatrixSet, optional
+        TileMatrixSet to use, default is WebMercatorQuad.
+    max_dates: int, optional
+        Number of dates read concurrently.
+    reader_options: dict, optional
+        STACReader options (e.g `include_assets`).
+
+    """
+
+    items: Sequence[Union[str, Dict]]
+    tms: morecantile.TileMatrixSet = TMS
+    max_dates: int = 8
+    reader_options: Dict = field(default_factory=dict)
+
+    def __enter__(self):
+        """Support using with Context Managers."""
+
+        def worker(item: Union[str, Dict]) -> STACReader:
+            if isinstance(item, str):
+                reader = STACReader(item, tms=self.tms, **self.reader_options)
+            else:
+                reader = STACReader(
+                    None, item=item, tms=self.tms, **self.reader_options
+                )
+            return reader.__enter__()
+
+        with futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
+            self.readers: List[STACReader] = list(executor.map(worker, self.items))
+
+        self.times = [
+            reader.item["properties"].get("datetime") for reader in self.readers
+        ]
+        return self
+
+    def __exit__(self, *args):
+        """Support using with Context Managers."""
+        for reader in self.readers:
+            reader.__exit__(*args)
+
+    def _iter_dates(
+        self, readers: Sequence[STACReader], read: Callable[[STACReader], Any]
+    ) -> Iterator[Tuple[int, Any]]:
+        """Yield (date index, result) in order, reading `max_dates` at a time."""
+        with futures.ThreadPoolExecutor(max_workers=self.max_dates) as executor:
+            for start in range(0, len(readers), self.max_dates):
+                group = readers[start : start + self.max_dates]
+                for ix, result in zip(
+                    range(start, start + len(group)), executor.map(read, group)
+                ):
+                    if result is not None:
+                        yield ix, result
+
+    def tile(
+        self,
+        tile_x: int,
+        tile_y: int,
+        tile_z: int,
+        reducer: Optional[Union[str, Reducer]] = None,
+        **kwargs: Any,
+    ) -> Union[
+        Tuple[List[str], numpy.ndarray, numpy.ndarray],
+        Tuple[numpy.ndarray, numpy.ndarray],
+    ]:
+        """
+        Read a TMS map tile from each date.
+
+        Without reducer, return `(times, data, mask)` with data of shape
+        (time, band, y, x) and mask of shape (time, y, x), for dates
+        covering the tile. With a reducer (name or instance), return the
+        reduced `(data, mask)`.
+
+        """
+        bounds = self.tms.bounds(morecantile.Tile(tile_x, tile_y, tile_z))
+        readers = [
+            (ix, reader)
+            for ix, reader in enumerate(self.readers)
+            if reader.bounds[0] <= bounds[2]
+            and reader.bounds[2] >= bounds[0]
+            and reader.bounds[1] <= bounds[3]
+            and reader.bounds[3] >= bounds[1]
+        ]
+
+        def read(reader: STACReader) -> Optional[Tuple[numpy.ndarray, numpy.ndarray]]:
+            try:
+                return reader.tile(tile_x, tile_y, tile_z, **kwargs)
+            except TileOutsideBounds:
+                return None
+
+        results = self._iter_dates([reader for _, reader in readers], read)
+
+        if reducer is not None:
+            if isinstance(reducer, str):
+                reducer = REDUCERS[reducer]()
+
+            for _, (data, mask) in results:
+                reducer.update(data, mask)
+
+            if reducer.mask is None:
+                raise TileOutsideBounds(
+                    f"Tile {tile_z}/{tile_x}/{tile_y} is outside all items bounds"
+                )
+            return reducer.result()
+
+        times, data, masks = [], [], []
+        for ix, (tile, mask) in results:
+            times.append(self.times[readers[ix][0]])
+            data.append(tile)
+            masks.append(mask)
+
+        if not data:
+            raise TileOutsideBounds(
+                f"Tile {tile_z}/{tile_x}/{tile_y} is outside all items bounds"
+            )
+        return times, numpy.stack(data), numpy.stack(masks)
+
+    def point(self, lon: float, lat: float, **kwargs: Any) -> List[Tuple[str, List]]:
+        """Read a value from each date covering the point, as (time, values)."""
+        readers = [
+            (ix, reader)
+            for ix, reader in enumerate(self.readers)
+            if _contains(reader.bounds, lon, lat)
+        ]
+        results = self._iter_dates(
+            [reader for _, reader in readers],
+            lambda reader: reader.point(lon, lat, **kwargs),
+        )
+        return [(self.times[readers[ix][0]], values) for ix, values in results]
@@ -0,0 +1,128 @@
+"""Tests for stac_tiler.assets."""
+
+import copy
+import json
+import os
+import time
+
+from stac_tiler import STACReader
+from stac_tiler.assets import AssetIndex, get_asset_index
+
+prefix = os.path.join(os.path.dirname(__file__), "fixtures")
+STAC_PATH = os.path.join(prefix, "item.json")
+
+with open(STAC_PATH) as f:
+    ITEM = json.load(f)
+
+
+def _item_with_bands():
+    item = copy.deepcopy(ITEM)
+    item["properties"]["updated"] = "2020-06-10T00:00:00Z"
+    item["assets"]["visual"]["roles"] = ["visual"]
+    item["assets"]["visual"]["eo:bands"] = [
+        {"name": "B04", "common_name": "red"},
+        {"name": "B03", "common_name": "green"},
+        {"name": "B02", "common_name": "blue"},
+    ]
+    item["assets"]["B04"]["roles"] = ["data"]
+    item["assets"]["B04"]["eo:bands"] = [{"name": "B04", "common_name": "red"}]
+    item["assets"]["B08"]["roles"] = ["data"]
+    item["assets"]["B08"]["eo:bands"] = [{"name": "B08", "common_name": "nir"}]
+    return item
+
+
+def test_asset_index():
+    """Should index assets by type, role and band."""
+    index = AssetIndex(_item_with_bands())
+    assert index.names[0] == "thumbnail"
+    assert index.assets["B01"].resolution == 60
+    assert index.assets["thumbnail"].resolution == 10
+    assert index.by_type["image/png"] == {"thumbnail"}
+    assert index.by_role["data"] == {"B04", "B08"}
+    assert index.get_band("red") == [("visual", 1), ("B04", 1)]
+    assert index.get_band("B02") == [("visual", 3)]
+    assert index.get_band("swir") == []
+
+    names, names_set = index.select(include={"B08", "B04", "B01"})
+    assert names == ("B01", "B04", "B08")
+    assert names_set == {"B01", "B04", "B08"}
+    assert index.select(include={"B08", "B04", "B01"})[0] is names
+
+    names, _ = index.select(
+        include_asset_types={"application/xml", "image/png"},
+        include={"metadata", "overview"},
+    )
+    assert names == ("metadata",)
+
+    names, _ = index.select(include_asset_roles={"data", "visual"}, exclude={"B08"})
+    assert names == ("visual", "B04")
+
+    # STAC 0.9 band indexes
+    item = copy.deepcopy(ITEM)
+    item["properties"]["eo:bands"] = [{"name": "B01", "common_name": "coastal"}]
+    item["assets"]["B01"]["eo:bands"] = [0]
+    assert AssetIndex(item).get_band("coastal") == [("B01", 1)]
+
+
+def test_get_asset_index():
+    """Should reuse the index of the same item."""
+    item = _item_with_bands()
+    index = get_asset_index(item)
+    assert get_asset_index(copy.deepcopy(item)) is index
+
+    # Signed hrefs don't change the index
+    item["assets"]["B01"]["href"] += "?signature=abc"
+    assert get_asset_index(item) is index
+
+    # A new version of the item does
+    item["assets"]["B01"]["type"] = "application/json"
+    item["properties"]["updated"] = "2020-06-11T00:00:00Z"
+    changed = get_asset_index(item)
+    assert changed is not index
+    cog = "image/tiff; application=geotiff; profile=cloud-optimized"
+    assert "B01" not in changed.select(include_asset_types={cog})[1]
+
+    # Items without `updated` are indexed once per object
+    item = copy.deepcopy(ITEM)
+    del item["properties"]["updated"]
+    index = get_asset_index(item)
+    assert get_asset_index(item) is index
+    assert get_asset_index(copy.deepcopy(item)) is not index
+
+
+def test_get_asset_index_large_item():
+    """Should not walk the item assets to find its index."""
+    item = copy.deepcopy(ITEM)
+    item["id"] = "large"
+    item["assets"] = {
+        f"B{ix:03d}": dict(ITEM["assets"]["B01"], href=f"B{ix:03d}.tif")
+        for ix in range(500)
+    }
+
+    start = time.perf_counter()
+    AssetIndex(item)
+    build = time.perf_counter() - start
+
+    get_asset_index(item)
+    start = time.perf_counter()
+    for _ in range(100):
+        get_asset_index(item)
+    hit = (time.perf_counter() - start) / 100
+    assert hit < build / 50
+
+
+def test_asset_index_selections():
+    """Should bound memoised selections."""
+    index = AssetIndex(_item_with_bands())
+    for ix in range(100):
+        index.select(include={f"B{ix:02d}"})
+    assert len(index._selections) == 64
+
+
+def test_reader_asset_roles():
+    """Should select assets by roles and band names."""
+    item = _item_with_bands()
+    with STACReader(None, item=item, include_asset_roles={"data"}) as stac:
+        assert stac.assets == ["B04", "B08"]
+        assert stac.get_band_assets("red") == [("B04", 1)]
+        assert stac.get_band_assets("nir") == [("B08", 1)]
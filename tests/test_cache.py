@@ -0,0 +1,87 @@
+"""Tests for stac_tiler.cache."""
+
+import os
+import time
+
+import numpy
+import pytest
+from stac_tiler.cache import ArrayCache
+
+
+def _arrays(value=1, size=10):
+    return (
+        numpy.full((1, size, size), value, dtype="uint8"),
+        numpy.full((size, size), 255, dtype="uint8"),
+    )
+
+
+def test_memory_cache():
+    """Should keep entries within the memory budget."""
+    cache = ArrayCache(max_size=450)
+    assert cache.enabled
+    assert cache.get("a") is None
+
+    cache.set("a", _arrays(1))
+    data, mask = cache.get("a")
+    assert data[0, 0, 0] == 1
+    with pytest.raises(ValueError):
+        data[0, 0, 0] = 2
+
+    cache.set("b", _arrays(2))
+    cache.get("a")
+    cache.set("c", _arrays(3))  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.size == 400
+
+    # Too big for the memory tier
+    cache.set("d", _arrays(4, size=100))
+    assert cache.get("d") is None
+
+    metrics = cache.metrics
+    assert metrics["items"] == 2
+    assert metrics["hits"] == 4
+    assert metrics["misses"] == 3
+
+    assert not ArrayCache().enabled
+
+
+def test_disk_cache(tmp_path):
+    """Should read entries back from the disk tier."""
+    directory = str(tmp_path)
+    cache = ArrayCache(directory=directory)
+    cache.set("a", _arrays(1))
+
+    # Another process (or cache instance) sharing the directory
+    other = ArrayCache(max_size=1000, directory=directory)
+    data, mask = other.get("a")
+    assert isinstance(data, numpy.memmap)
+    assert data[0, 0, 0] == 1
+    assert mask.shape == (10, 10)
+
+    # Memory-mapped hits don't use the memory tier budget
+    assert other.size == 0
+    assert other.metrics["hits"] == 1
+
+
+def test_disk_cache_budget(tmp_path):
+    """Should bound the whole directory, evicting least recently used entries."""
+    directory = str(tmp_path)
+    entry_size = 2 * (128 + 100) + 1  # 2 `.npy` files and the `.count` file
+
+    cache = ArrayCache(directory=directory, max_disk_size=2 * entry_size)
+    other = ArrayCache(directory=directory, max_disk_size=2 * entry_size)
+
+    cache.set("a", _arrays(1))
+    other.set("b", _arrays(2))
+    time.sleep(0.01)
+    assert other.get("a") is not None  # "b" is now the least recently used
+    time.sleep(0.01)
+    cache.set("c", _arrays(3))
+
+    assert cache.disk_size == 2 * entry_size
+    assert other.get("b") is None
+    assert other.get("a") is not None
+    assert other.get("c") is not None
+    assert len([f for f in os.listdir(directory) if f.endswith(".npy")]) == 4
@@ -0,0 +1,105 @@
+"""Tests for stac_tiler.catalog."""
+
+import os
+
+import numpy
+import pytest
+from stac_tiler import STACReader
+from stac_tiler.catalog import CatalogIndex
+
+prefix = os.path.join(os.path.dirname(__file__), "fixtures")
+STAC_PATH = os.path.join(prefix, "item.json")
+
+
+def _items(count=1000, seed=0):
+    rng = numpy.random.RandomState(seed)
+    items = []
+    for ix in range(count):
+        x, y = rng.uniform(-170, 170), rng.uniform(-80, 80)
+        w, h = rng.uniform(0.1, 5, size=2)
+        items.append(
+            {
+                "id": f"item-{ix}",
+                "bbox": [x, y, x + w, y + h],
+                "properties": {
+                    "datetime": f"2020-{ix % 12 + 1:02d}-01T00:00:00Z",
+                    "platform": "sentinel-2a" if ix % 2 else "sentinel-2b",
+                },
+                "assets": {},
+            }
+        )
+    return items
+
+
+def _brute_force(items, bbox):
+    return {
+        item["id"]
+        for item in items
+        if item["bbox"][0] <= bbox[2]
+        and item["bbox"][2] >= bbox[0]
+        and item["bbox"][1] <= bbox[3]
+        and item["bbox"][3] >= bbox[1]
+    }
+
+
+@pytest.mark.parametrize("count", [0, 1, 16, 17, 1000])
+def test_catalog_search(count):
+    """Should return the same items as a linear scan."""
+    items = _items(count)
+    index = CatalogIndex.from_items(items)
+    assert len(index) == count
+
+    for bbox in [(-10, -10, 10, 10), (100, 20, 101, 21), (-180, -90, 180, 90)]:
+        found = {record["id"] for record in index.search(bbox)}
+        assert found == _brute_force(items, bbox)
+
+
+def test_catalog_3d_bbox():
+    """Should use the horizontal extent of 3D bboxes."""
+    items = _items(20)
+    for item in items:
+        minx, miny, maxx, maxy = item["bbox"]
+        item["bbox"] = [minx, miny, 0, maxx, maxy, 100]
+
+    index = CatalogIndex.from_items(items)
+    for bbox in [(-10, -10, 10, 10), (-180, -90, 180, 90)]:
+        found = {record["id"] for record in index.search(bbox)}
+        assert found == _brute_force(_items(20), bbox)
+
+
+def test_catalog_filters(tmp_path):
+    """Should filter by datetime and properties and persist to disk."""
+    items = _items()
+    index = CatalogIndex.from_items(items)
+    bbox = (-180, -90, 180, 90)
+
+    records = index.search(bbox, datetime=("2020-03-01T00:00:00Z", "2020-04-01"))
+    assert len(records) == len(
+        [i for i in items if i["properties"]["datetime"][5:7] in ["03", "04"]]
+    )
+
+    records = index.search(bbox, datetime=(None, "2020-01-15"))
+    assert all(r["properties"]["datetime"].startswith("2020-01") for r in records)
+
+    records = index.search(bbox, query={"platform": "sentinel-2a"})
+    assert len(records) == 500
+    assert records[0]["item"]["id"] == records[0]["id"]
+
+    index.save(str(tmp_path))
+    loaded = CatalogIndex.load(str(tmp_path))
+    assert isinstance(loaded.bboxes, numpy.memmap)
+    assert loaded.search((-10, -10, 10, 10)) == index.search((-10, -10, 10, 10))
+
+
+def test_catalog_tile():
+    """Should return readers for items intersecting a tile."""
+    index = CatalogIndex.from_items([STAC_PATH] + _items(100))
+    records = index.tile(289, 207, 9)
+    assert [record["href"] for record in records] == [STAC_PATH]
+    assert not index.tile(0, 0, 9)
+
+    readers = list(index.tile_readers(289, 207, 9, include_assets={"B01"}))
+    assert len(readers) == 1
+    assert isinstance(readers[0], STACReader)
+    with readers[0] as stac:
+        assert stac.assets == ["B01"]
@@ -0,0 +1,218 @@
+"""Tests for stac_tiler.concurrency."""
+
+import random
+import threading
+import time
+from concurrent import futures
+
+import pytest
+from stac_tiler.concurrency import (
+    AdaptiveLimiter,
+    MemoryBudget,
+    SingleFlight,
+    get_backend,
+    make_key,
+)
+from stac_tiler.errors import MemoryBudgetExceeded
+
+
+def test_make_key():
+    """Should return None for unhashable parts."""
+    assert make_key("tile", "a.tif", (1, 2, 3)) == ("tile", "a.tif", (1, 2, 3))
+    assert make_key("tile", "a.tif", [1, 2, 3]) is None
+
+
+def test_single_flight():
+    """Should share one execution between concurrent identical calls."""
+    flight = SingleFlight()
+    calls = []
+    start = threading.Event()
+
+    def read(value):
+        calls.append(value)
+        start.wait(1)
+        time.sleep(0.2)
+        return value * 2
+
+    with futures.ThreadPoolExecutor(max_workers=4) as executor:
+        results = [executor.submit(flight.do, ("k",), read, 2) for _ in range(4)]
+        start.set()
+        assert [r.result() for r in results] == [4, 4, 4, 4]
+
+    assert len(calls) == 1
+    assert flight.in_flight == 0
+
+    # Sequential calls are not coalesced
+    assert flight.do(("k",), read, 3) == 6
+    assert len(calls) == 2
+
+    # No key, no coalescing
+    assert flight.do(None, read, 1) == 2
+    assert len(calls) == 3
+
+
+def test_single_flight_error():
+    """Should propagate errors and forget the failed call."""
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("nope")
+
+    with pytest.raises(ValueError):
+        flight.do(("k",), fail)
+
+    assert flight.in_flight == 0
+    assert flight.do(("k",), lambda: 1) == 1
+
+
+def test_get_backend():
+    """Should return the storage backend."""
+    assert get_backend("s3://bucket/key.tif") == "s3"
+    assert get_backend("https://host/key.tif") == "http"
+    assert get_backend("/data/key.tif") == "local"
+
+
+def test_adaptive_limiter():
+    """Should increase additively and decrease multiplicatively."""
+    limiter = AdaptiveLimiter(initial=4, min_limit=2, max_limit=6, window=30)
+    assert limiter.limit == 4
+
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(0.1)
+    assert limiter.limit == 6
+
+    # Errors decrease the limit, once per round
+    limiter.acquire()
+    limiter.release(0.1, error=True)
+    assert limiter.limit == 4
+    limiter.acquire()
+    limiter.release(0.1, error=True)
+    assert limiter.limit == 4
+
+    # Sustained latency much higher than the baseline one
+    time.sleep(0.5)
+    limiter.acquire()
+    limiter.release(1.0)
+    assert limiter.limit == 4
+    limiter.acquire()
+    limiter.release(1.0)
+    assert limiter.limit == 3
+
+    metrics = limiter.metrics
+    assert metrics["in_flight"] == 0
+    assert metrics["errors"] == 2
+    assert metrics["requests"] == 24
+    assert metrics["baselines"] == {None: 0.1}
+
+
+def test_adaptive_limiter_baseline():
+    """Should recover under steady latency after a fast read."""
+    limiter = AdaptiveLimiter(initial=16, max_limit=16, window=50)
+
+    limiter.acquire()
+    limiter.release(0.002)
+    for _ in range(400):
+        limiter.acquire()
+        limiter.release(0.05)
+        # Let every slow read count as a new round
+        limiter._decreased_at -= 1
+
+    assert limiter.baseline() == 0.05
+    assert limiter.limit == 16
+
+    # Kinds of reads have their own baseline
+    limiter.acquire()
+    limiter.release(0.5, kind="info")
+    assert limiter.limit == 16
+    assert limiter.baseline("info") == 0.5
+
+
+def test_adaptive_limiter_jitter():
+    """Should not back off on latency jitter independent of the concurrency."""
+    rnd = random.Random(0)
+    for sigma in (0.3, 0.5, 0.8):
+        limiter = AdaptiveLimiter(initial=16, max_limit=80)
+        for _ in range(5000):
+            limiter.acquire()
+            limiter.release(0.05 * rnd.lognormvariate(0, sigma))
+            # Let every slow read count as a new round
+            limiter._decreased_at -= 1
+
+        assert limiter.limit == 80
+
+    # But on a lasting latency increase
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release(0.2 * rnd.lognormvariate(0, sigma))
+        limiter._decreased_at -= 1
+    assert limiter.limit < 80
+
+
+def test_adaptive_limiter_slot():
+    """Should bound in-flight calls and count backend errors."""
+    limiter = AdaptiveLimiter(initial=2, max_limit=2)
+    peak = []
+
+    def read():
+        with limiter.slot():
+            peak.append(limiter.in_flight)
+            time.sleep(0.05)
+
+    with futures.ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(lambda _: read(), range(6)))
+    assert max(peak) == 2
+
+    with pytest.raises(ValueError):
+        with limiter.slot():
+            raise ValueError("not a backend error")
+    assert limiter.errors == 0
+
+    with pytest.raises(OSError):
+        with limiter.slot():
+            raise OSError("timeout")
+    assert limiter.errors == 1
+    assert limiter.in_flight == 0
+
+
+def test_memory_budget():
+    """Should admit requests while they fit in the budget."""
+    budget = MemoryBudget(max_size=100, timeout=0.1)
+    peak = []
+
+    def read(nbytes):
+        with budget.reserve(nbytes):
+            peak.append(budget.reserved)
+            time.sleep(0.02)
+
+    with futures.ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(read, [40] * 6))
+    assert max(peak) <= 80
+    assert budget.metrics["admitted"] == 6
+
+    # Larger than the whole budget
+    with pytest.raises(MemoryBudgetExceeded):
+        budget.acquire(101)
+
+    # Waited too long
+    budget.acquire(60)
+    with pytest.raises(MemoryBudgetExceeded):
+        budget.acquire(60)
+
+    # Don't wait at all
+    budget.timeout = None
+    with budget.nonblocking():
+        with pytest.raises(MemoryBudgetExceeded):
+            budget.acquire(60)
+        budget.acquire(40)
+    budget.release(100)
+
+    metrics = budget.metrics
+    assert metrics["reserved"] == 0
+    assert metrics["waiting"] == 0
+    assert metrics["rejected"] == 3
+
+    # Disabled
+    budget = MemoryBudget()
+    with budget.reserve(10 ** 12):
+        assert budget.reserved == 0
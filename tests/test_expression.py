@@ -0,0 +1,67 @@
+"""Tests for stac_tiler.expression."""
+
+import numpy
+import pytest
+from stac_tiler.expression import ExpressionPlan
+
+BANDS = {
+    "red": [("visual", 1), ("B04", 1)],
+    "green": [("visual", 2)],
+    "nir": [("B08", 1)],
+}
+ASSETS = {"visual", "B04", "B08"}
+
+
+def test_expression_plan():
+    """Should map variables to asset bands."""
+    plan = ExpressionPlan("(nir-red)/(nir+red)", ASSETS, lambda n: BANDS.get(n, []))
+    assert plan.variables == {"nir": ("B08", 1), "red": ("visual", 1)}
+    assert plan.assets == ["B08", "visual"]
+    assert plan.asset_indexes == [(1,), (1,)]
+
+    # Prefer bands from assets already used
+    plan = ExpressionPlan("B04/red", ASSETS, lambda n: BANDS.get(n, []))
+    assert plan.variables == {"B04": ("B04", 1), "red": ("B04", 1)}
+    assert plan.assets == ["B04"]
+    assert plan.asset_indexes == [(1,)]
+
+    plan = ExpressionPlan("visual_b3/green,B08", ASSETS, lambda n: BANDS.get(n, []))
+    assert plan.variables == {
+        "visual_b3": ("visual", 3),
+        "green": ("visual", 2),
+        "B08": ("B08", 1),
+    }
+    assert plan.asset_indexes == [(2, 3), (1,)]
+    assert plan.rows == [1, 2, 0]
+
+    data = numpy.array([[[2.0]], [[4.0]], [[3.0]]])
+    numpy.testing.assert_array_equal(plan.apply(data), [[[2.0]], [[3.0]]])
+
+    assert not ExpressionPlan("B01/B02", ASSETS, lambda n: []).assets
+
+
+def test_expression_plan_asset_options():
+    """Should not plan band indexes with asset expression or indexes."""
+    plan = ExpressionPlan(
+        "visual_b2/B08", ASSETS, lambda n: [], asset_expression="b1,b2"
+    )
+    assert plan.asset_indexes is None
+    assert plan.rows == [1, 2]
+
+    plan = ExpressionPlan("visual_b2/B08", ASSETS, lambda n: [], indexes=(1, 2, 3))
+    assert plan.asset_indexes is None
+    assert plan.rows == [1, 3]
+
+
+def test_expression_plan_full_read():
+    """Should read all bands of assets where a subset read isn't equivalent."""
+    plan = ExpressionPlan(
+        "visual_b3/B08", ASSETS, lambda n: [], subset=lambda asset: asset != "visual",
+    )
+    assert plan.asset_indexes == [None, (1,)]
+    with pytest.raises(ValueError):
+        plan.rows
+
+    # Rows are computed from the per-asset data
+    data = [numpy.array([[[1.0]], [[2.0]], [[6.0]]]), numpy.array([[[3.0]]])]
+    numpy.testing.assert_array_equal(plan.apply(data), [[[2.0]]])
@@ -0,0 +1,89 @@
+"""Tests for stac_tiler.prefetch."""
+
+from unittest.mock import patch
+
+import morecantile
+from stac_tiler import STACReader
+from stac_tiler.cache import ArrayCache
+from stac_tiler.concurrency import MemoryBudget
+from stac_tiler.prefetch import TilePrefetcher
+
+from .test_reader import STAC_PATH, mock_COGReader
+
+
+def test_candidates():
+    """Should return neighbours, parent and children within the TMS."""
+    tms = morecantile.tms.get("WebMercatorQuad")
+    tiles = list(TilePrefetcher.candidates(tms, 289, 207, 9))
+    assert len(tiles) == 13
+    assert tiles[0] == morecantile.Tile(288, 206, 9)
+    assert morecantile.Tile(144, 103, 8) in tiles
+    assert morecantile.Tile(579, 415, 10) in tiles
+
+    tiles = list(TilePrefetcher.candidates(tms, 0, 0, 0))
+    assert tiles == [morecantile.Tile(x, y, 1) for y in (0, 1) for x in (0, 1)]
+
+
+@patch("stac_tiler.reader.COGReader", mock_COGReader)
+def test_prefetch():
+    """Should read neighbour tiles into the cache."""
+    cache = ArrayCache(max_size=64 * 1024 * 1024)
+    prefetcher = TilePrefetcher(max_pending=64)
+
+    with patch("stac_tiler.reader.CACHE", cache):
+        with STACReader(STAC_PATH, prefetcher=prefetcher) as stac:
+            stac.tile(289, 207, 9, assets=["B01"])
+            prefetcher.shutdown(cancel_futures=False)
+            # Tiles overlapping the item (no prefetch of prefetched tiles)
+            assert prefetcher.scheduled == 8
+            assert cache.metrics["misses"] == 9
+            assert cache.metrics["items"] == 9
+
+            stac.prefetcher = None
+            stac.tile(289, 208, 9, assets=["B01"])
+            assert cache.metrics["hits"] == 1
+
+
+def test_prefetch_overloaded():
+    """Should not prefetch when asset reads are saturated."""
+    prefetcher = TilePrefetcher(load_threshold=0)
+    cache = ArrayCache(max_size=64 * 1024 * 1024)
+    with patch("stac_tiler.reader.CACHE", cache), patch(
+        "stac_tiler.reader.LIMITERS"
+    ) as limiters:
+        limiters.values.return_value = [type("L", (), {"in_flight": 1, "limit": 4})]
+        assert prefetcher.overloaded()
+        with STACReader(STAC_PATH) as stac:
+            prefetcher.schedule(stac, 289, 207, 9, assets=("B01",))
+        assert prefetcher.skipped == 1
+        assert prefetcher.scheduled == 0
+    prefetcher.shutdown()
+
+
+@patch("stac_tiler.reader.COGReader", mock_COGReader)
+def test_prefetch_memory_budget():
+    """Should not prefetch when the memory budget is in use or wait for it."""
+    cache = ArrayCache(max_size=64 * 1024 * 1024)
+    budget = MemoryBudget(max_size=10 * 1024 * 1024)
+    prefetcher = TilePrefetcher()
+
+    with patch("stac_tiler.reader.CACHE", cache), patch(
+        "stac_tiler.reader.MEMORY_BUDGET", budget
+    ):
+        budget.acquire(6 * 1024 * 1024)
+        assert prefetcher.overloaded()
+        budget.release(6 * 1024 * 1024)
+        assert not prefetcher.overloaded()
+
+        # Prefetches are rejected instead of waiting for requests
+        prefetcher.load_threshold = 1.0
+        budget.acquire(budget.max_size)
+        assert not prefetcher.overloaded()
+        with STACReader(STAC_PATH) as stac:
+            prefetcher._prefetch(stac, morecantile.Tile(289, 208, 9), {"assets": "B01"})
+        assert budget.metrics["rejected"] == 1
+        assert budget.metrics["waiting"] == 0
+        assert cache.metrics["items"] == 0
+        budget.release(budget.max_size)
+
+    prefetcher.shutdown()
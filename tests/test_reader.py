@@ -2,13 +2,19 @@
 
 import json
 import os
+from typing import Dict, List
 from unittest.mock import patch
 
 import morecantile
+import numpy
 import pytest
 import rasterio
 from rasterio.warp import transform_bounds
 from stac_tiler import STACReader
+from stac_tiler.cache import ArrayCache
+from stac_tiler.concurrency import MemoryBudget
+from stac_tiler.errors import MemoryBudgetExceeded
+from stac_tiler.reader import GDAL_CONFIG
 
 from rio_tiler import constants
 from rio_tiler.errors import InvalidBandName
@@ -204,6 +210,175 @@ def test_reader_tiles():
     assert mask.shape == (256, 256)
 
 
+@patch("stac_tiler.reader.COGReader", mock_COGReader)
+def test_reader_cache():
+    """Should serve repeated tile reads from the cache."""
+    tile = morecantile.Tile(z=9, x=289, y=207)
+    cache = ArrayCache(max_size=10 * 1024 * 1024)
+
+    with patch("stac_tiler.reader.CACHE", cache):
+        with STACReader(STAC_PATH) as stac:
+            data, mask = stac.tile(*tile, assets=["B01", "B02"])
+            assert cache.metrics["misses"] == 2
+
+            data_cached, mask_cached = stac.tile(*tile, assets="B01")
+            assert cache.metrics["hits"] == 1
+            numpy.testing.assert_array_equal(data[0:1], data_cached)
+            # Returned arrays are copies, not the cached ones
+            data_cached[0, 0, 0] = 0
+
+            # info and point are not cached
+            stac.info(assets="B01")
+            assert cache.metrics["items"] == 2
+
+        # Nor reads of items without `updated`
+        with open(STAC_PATH) as f:
+            item = json.load(f)
+        del item["properties"]["updated"]
+        with STACReader(None, item=item) as stac:
+            stac.tile(*tile, assets="B03")
+            assert cache.metrics["items"] == 2
+
+
+class config_COGReader(mock_COGReader):
+    """Mock COGReader recording the GDAL config of reads."""
+
+    configs: List[Dict] = []
+
+    def __enter__(self):
+        """Record GDAL cache options."""
+        self.configs.append(
+            {key: rasterio.env.get_gdal_config(key) for key in GDAL_CONFIG}
+        )
+        return super().__enter__()
+
+
+@patch("stac_tiler.reader.COGReader", config_COGReader)
+def test_reader_gdal_config():
+    """Should read assets with GDAL block caches."""
+    with STACReader(STAC_PATH) as stac:
+        stac.tile(289, 207, 9, assets="B01")
+
+    assert config_COGReader.configs == [
+        {
+            "VSI_CACHE": True,
+            "VSI_CACHE_SIZE": 25 * 1024 ** 2,
+            "CPL_VSIL_CURL_CACHE_SIZE": 128 * 1024 ** 2,
+            "GDAL_CACHEMAX": 256,
+        }
+    ]
+
+
+@patch("stac_tiler.reader.COGReader", mock_COGReader)
+def test_reader_memory_budget():
+    """Should reserve the estimated request memory."""
+    tile = morecantile.Tile(z=9, x=289, y=207)
+
+    with STACReader(STAC_PATH) as stac:
+        # Without a budget, nothing is estimated
+        assert stac._estimate_size(["B01"], 256 * 256) == 0
+
+        with patch("stac_tiler.reader.MEMORY_BUDGET", MemoryBudget(1)):
+            # uint16 data (from the COG header) + mask, twice, + output mask
+            small = stac._estimate_size(["B01"], 256 * 256)
+            assert small == 2 * 256 * 256 * 3 + 256 * 256
+            assert (
+                stac._estimate_size(["B01", "B02"], 256 * 256) == 2 * small - 256 * 256
+            )
+            assert stac._estimate_size(["B01"], 512 * 512) > small
+
+        with patch("stac_tiler.reader.MEMORY_BUDGET", MemoryBudget(small)) as budget:
+            stac.tile(*tile, assets="B01")
+            assert budget.metrics["admitted"] == 1
+            assert budget.metrics["reserved"] == 0
+
+            with pytest.raises(MemoryBudgetExceeded):
+                stac.tile(*tile, assets=["B01", "B02"])
+
+            with pytest.raises(MemoryBudgetExceeded):
+                stac.preview(assets="B01")
+            assert budget.metrics["rejected"] == 2
+
+    # Full resolution parts use the COG size when `proj:shape` is missing
+    with open(STAC_PATH) as f:
+        item = json.load(f)
+    del item["assets"]["B02"]["proj:shape"]
+    with STACReader(None, item=item) as stac:
+        with patch("stac_tiler.reader.MEMORY_BUDGET", MemoryBudget(1)):
+            assert stac._full_pixels(stac.bounds, ["B02"]) == 1098 * 1098
+            assert stac._full_pixels(stac.bounds, ["B01"]) == 1830 * 1830
+
+        budget = MemoryBudget(stac._estimate_size(["B02"], 1024 * 1024) + 1)
+        with patch("stac_tiler.reader.MEMORY_BUDGET", budget):
+            with pytest.raises(MemoryBudgetExceeded):
+                stac.part(stac.bounds, assets="B02", max_size=None)
+
+
+@patch("stac_tiler.reader.COGReader", mock_COGReader)
+def test_reader_band_expression():
+    """Should only read bands used by the expression when it's safe."""
+    tile = morecantile.Tile(z=9, x=289, y=207)
+
+    with open(STAC_PATH) as f:
+        item = json.load(f)
+    item["properties"]["updated"] = "2020-07-01T00:00:00Z"
+    item["assets"]["visual"]["eo:bands"] = [
+        {"name": "B04", "common_name": "red"},
+        {"name": "B03", "common_name": "green"},
+        {"name": "B02", "common_name": "blue"},
+    ]
+    item["assets"]["B08"]["eo:bands"] = [{"name": "B08", "common_name": "nir"}]
+
+    def tile_indexes(read):
+        return sorted(
+            call[1].get("indexes") or ()
+            for call in read.call_args_list
+            if call[0][1] == "tile"
+        )
+
+    # Multi-band assets with nodata (from the COG header) are read in full
+    with STACReader(None, item=item, exclude_assets={"B04"}) as stac:
+        assert stac._header(item["assets"]["visual"]["href"])["nodata"] == 0
+
+        with patch.object(stac, "_read", wraps=stac._read) as read:
+            data, mask = stac.tile(*tile, expression="(nir-red)/(nir+red)")
+            assert data.shape == (1, 256, 256)
+            assert tile_indexes(read) == [(), (1,)]
+
+        data, _ = stac.tile(*tile, expression="visual_b1,visual_b3")
+        visual, _ = stac.tile(*tile, assets="visual")
+        numpy.testing.assert_array_equal(data, visual[[0, 2]])
+
+    # Without nodata in the COG header, only the bands used are read
+    header = {"width": 343, "height": 343, "count": 3, "dtype": "uint8", "nodata": None}
+    with STACReader(None, item=item, exclude_assets={"B04"}) as stac:
+        with patch.object(stac, "_header", return_value=header):
+            with patch.object(stac, "_read", wraps=stac._read) as read:
+                stac.tile(*tile, expression="(nir-red)/(nir+red)")
+                assert tile_indexes(read) == [(1,), (1,)]
+
+    # Or without nodata in `raster:bands`
+    item["assets"]["visual"]["raster:bands"] = [{"data_type": "uint8"}] * 3
+    item["assets"]["B08"]["raster:bands"] = [{"data_type": "uint16"}]
+    with STACReader(None, item=item, exclude_assets={"B04"}) as stac:
+        with patch.object(stac, "_read", wraps=stac._read) as read:
+            data, mask = stac.tile(*tile, expression="(nir-red)/(nir+red)")
+            assert tile_indexes(read) == [(1,), (1,)]
+
+        data, _ = stac.tile(*tile, expression="visual_b1,visual_b3")
+        visual, _ = stac.tile(*tile, assets="visual", indexes=(1, 3))
+        numpy.testing.assert_array_equal(data, visual)
+
+        # Unless the request sets nodata
+        with patch.object(stac, "_read", wraps=stac._read) as read:
+            stac.tile(*tile, expression="visual_b1,visual_b3", nodata=0)
+            assert read.call_args[1].get("indexes") is None
+
+        values = stac.point(23.7, 32, expression="red/blue")
+        assert len(values) == 1
+        assert len(values[0]) == 1
+
+
 @patch("stac_tiler.reader.COGReader", mock_COGReader)
 def test_reader_part():
     """Test STACReader.part."""
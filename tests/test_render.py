@@ -0,0 +1,87 @@
+"""Tests for stac_tiler.render."""
+
+from io import BytesIO
+from unittest.mock import patch
+
+import numpy
+import pytest
+import rasterio
+from stac_tiler import STACReader
+from stac_tiler.render import encode, render, to_uint8
+
+from rio_tiler.colormap import cmap
+
+from .test_reader import STAC_PATH, mock_COGReader
+
+
+def test_to_uint8():
+    """Should rescale, colormap and mask in one image."""
+    data = numpy.array([[[0, 500], [1000, 2000]]], dtype="uint16")
+    mask = numpy.array([[255, 255], [255, 0]], dtype="uint8")
+
+    image = to_uint8(data, mask, in_range=(0, 1000))
+    assert image.dtype == numpy.uint8
+    numpy.testing.assert_array_equal(image[0], [[0, 128], [255, 255]])
+    numpy.testing.assert_array_equal(image[1], mask)
+
+    image = to_uint8(data)
+    assert image.shape == (1, 2, 2)
+    assert image[0, 1, 1] == 8
+
+    data = numpy.array([[[0.1, numpy.nan]], [[0.5, 1.0]]])
+    image = to_uint8(data, in_range=[(0, 1), (0, 0.5)])
+    numpy.testing.assert_array_equal(image, [[[26, 0]], [[255, 255]]])
+
+    data = numpy.array([[[0, 255]]], dtype="uint8")
+    colormap = cmap.get("viridis")
+    image = to_uint8(data, numpy.array([[255, 0]], dtype="uint8"), colormap=colormap)
+    assert image.shape == (4, 1, 2)
+    assert image[:3, 0, 0].tolist() == colormap[0][:3]
+    assert image[3].tolist() == [[255, 0]]
+
+    with pytest.raises(ValueError):
+        to_uint8(numpy.zeros((2, 1, 1)), colormap=colormap)
+
+    # One range per band
+    with pytest.raises(ValueError):
+        to_uint8(numpy.zeros((3, 1, 1)), in_range=[(0, 2000)])
+    with pytest.raises(ValueError):
+        to_uint8(numpy.zeros((3, 1, 1)), in_range=[(0, 2000)] * 4)
+
+
+@pytest.mark.parametrize(
+    "img_format,count", [("PNG", 2), ("JPEG", 1), ("jpg", 1), ("WEBP", 4)]
+)
+def test_render(img_format, count):
+    """Should encode images."""
+    data = numpy.random.randint(0, 1000, size=(1, 256, 256), dtype="uint16")
+    mask = numpy.full((256, 256), 255, dtype="uint8")
+    mask[:10] = 0
+    content = render(data, mask, img_format=img_format, in_range=(0, 1000))
+    with rasterio.open(BytesIO(content)) as src:
+        assert src.count == count
+        assert src.dtypes[0] == "uint8"
+
+
+def test_encode():
+    """Should encode uint8 images without alpha."""
+    image = numpy.zeros((3, 16, 16), dtype="uint8")
+    with rasterio.open(BytesIO(encode(image, "PNG"))) as src:
+        assert src.count == 3
+
+
+@patch("stac_tiler.reader.COGReader", mock_COGReader)
+def test_reader_render():
+    """Should read and render a tile."""
+    with STACReader(STAC_PATH) as stac:
+        content = stac.render(
+            289,
+            207,
+            9,
+            expression="B04/B02",
+            in_range=(0, 2),
+            colormap=cmap.get("viridis"),
+        )
+    with rasterio.open(BytesIO(content)) as src:
+        assert src.driver == "PNG"
+        assert src.count == 4
@@ -0,0 +1,96 @@
+"""Tests for stac_tiler.shared."""
+
+import json
+import marshal
+import multiprocessing
+import os
+import time
+from unittest.mock import patch
+
+import numpy
+from stac_tiler import STACReader, reader
+from stac_tiler.shared import SharedCache
+
+from .test_reader import STAC_PATH, mock_COGReader
+
+
+def _warm(directory: str, key: tuple, value: dict):
+    SharedCache(directory).set(key, value)
+
+
+def test_shared_cache(tmpdir):
+    """Should share values between processes."""
+    directory = str(tmpdir)
+    value = {"bounds": (0.0, 1.0, 2.0, 3.0), "bands": [(1, "band1")], "nodata": None}
+
+    cache = SharedCache(directory)
+    assert cache.enabled
+    assert cache.get(("info", "a.tif")) is None
+
+    process = multiprocessing.Process(
+        target=_warm, args=(directory, ("info", "a.tif"), value)
+    )
+    process.start()
+    process.join()
+
+    assert cache.get(("info", "a.tif")) == value
+    assert cache.metrics["hits"] == 1
+    assert cache.metrics["misses"] == 1
+
+    # Unsupported values are skipped
+    cache.set("array", numpy.zeros(3))
+    assert cache.get("array") is None
+
+    assert not SharedCache().enabled
+
+
+def test_shared_cache_eviction(tmpdir):
+    """Should bound the whole directory and ignore expired entries."""
+    directory = os.path.join(str(tmpdir), "shared")
+    entry_size = len(marshal.dumps("a" * 60))
+
+    cache = SharedCache(directory, max_size=2 * entry_size)
+    other = SharedCache(directory, max_size=2 * entry_size)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+    cache.set("a", "a" * 60)
+    time.sleep(0.01)
+    other.set("b", "b" * 60)
+    time.sleep(0.01)
+    cache.set("c", "c" * 60)  # evicts "a", written by another instance
+    assert cache.metrics["size"] == 2 * entry_size
+    assert other.get("a") is None
+    assert other.get("b") == "b" * 60
+    assert other.get("c") == "c" * 60
+
+    old = time.time() - 600
+    os.utime(cache._path("b"), (old, old))
+    assert cache.get("b") is None
+
+    # Expired entries are removed
+    cache.prune()
+    assert not os.path.exists(cache._path("b"))
+    assert os.path.exists(cache._path("c"))
+
+
+@patch("stac_tiler.reader.COGReader", mock_COGReader)
+def test_reader_shared_cache(tmpdir):
+    """Should serve items and info from the shared cache."""
+    cache = SharedCache(str(tmpdir))
+    with open(STAC_PATH) as f:
+        item = json.load(f)
+
+    with patch("stac_tiler.reader.SHARED_CACHE", cache):
+        assert reader.fetch.__wrapped__(STAC_PATH) == item
+        assert cache.get(("item", STAC_PATH)) == item
+
+        with STACReader(None, item=item) as stac:
+            info = stac.info("B01")
+            assert len(os.listdir(str(tmpdir))) == 2
+
+    # Another process (with an empty cache state) reads it from the directory
+    with patch("stac_tiler.reader.SHARED_CACHE", SharedCache(str(tmpdir))):
+        with STACReader(None, item=item) as stac:
+            with patch("stac_tiler.reader.COGReader") as cog:
+                assert stac.info("B01") == info
+                assert not cog.called
@@ -0,0 +1,129 @@
+"""Tests for stac_tiler.stack."""
+
+import copy
+import json
+from unittest.mock import patch
+
+import numpy
+import pytest
+from stac_tiler.stack import REDUCERS, ArgMax, Reducer, TimeStackReader
+
+from rio_tiler.errors import TileOutsideBounds
+
+from .test_reader import STAC_PATH, mock_COGReader
+
+with open(STAC_PATH) as f:
+    ITEM = json.load(f)
+
+
+def _items(count=3):
+    items = []
+    for ix in range(count):
+        item = copy.deepcopy(ITEM)
+        item["id"] = f"{item['id']}-{ix}"
+        item["properties"]["datetime"] = f"2020-0{ix + 1}-01T00:00:00Z"
+        items.append(item)
+    return items
+
+
+def _dates():
+    data = numpy.array(
+        [[[[1, 5]], [[10, 50]]], [[[3, 2]], [[30, 20]]], [[[2, 9]], [[20, 90]]],]
+    )
+    mask = numpy.array([[[255, 255]], [[255, 0]], [[0, 0]]], dtype="uint8")
+    return data, mask
+
+
+@pytest.mark.parametrize(
+    "name,expected,expected_mask",
+    [
+        ("latest", [[[3, 5]], [[30, 50]]], [[255, 255]]),
+        ("max", [[[3, 5]], [[30, 50]]], [[255, 255]]),
+        ("mean", [[[2, 5]], [[20, 50]]], [[255, 255]]),
+        ("median", [[[2, 5]], [[20, 50]]], [[255, 255]]),
+    ],
+)
+def test_reducers(name, expected, expected_mask):
+    """Should reduce valid pixels only."""
+    reducer = REDUCERS[name]()
+    for data, mask in zip(*_dates()):
+        reducer.update(data, mask)
+
+    data, mask = reducer.result()
+    numpy.testing.assert_array_equal(data, expected)
+    numpy.testing.assert_array_equal(mask, expected_mask)
+
+
+@pytest.mark.parametrize("name", list(REDUCERS))
+def test_empty_reducers(name):
+    """Should return no data when no date was added."""
+    assert REDUCERS[name]().result() == (None, None)
+
+
+def test_reducer_abstract():
+    """Should require reducers to implement `_update`."""
+    with pytest.raises(TypeError):
+        Reducer()
+
+
+def test_median_reducer():
+    """Should bound the median memory and approximate it over many dates."""
+    rnd = numpy.random.RandomState(0)
+    data = rnd.normal(100, 10, size=(500, 2, 8, 8)).astype("float32")
+    mask = numpy.where(rnd.uniform(size=(500, 8, 8)) < 0.9, 255, 0).astype("uint8")
+    valid = numpy.ma.MaskedArray(
+        data, mask=~numpy.broadcast_to(mask[:, None] > 0, data.shape)
+    )
+
+    reducer = REDUCERS["median"]()
+    for d, m in zip(data[:9], mask[:9]):
+        reducer.update(d, m)
+    median, _ = reducer.result()
+    numpy.testing.assert_allclose(median, numpy.ma.median(valid[:9], axis=0), rtol=1e-6)
+
+    for d, m in zip(data[9:], mask[9:]):
+        reducer.update(d, m)
+    median, _ = reducer.result()
+    assert len(reducer.levels) == 3
+    error = numpy.abs(median - numpy.ma.median(valid, axis=0))
+    assert error.mean() < 1 and error.max() < 5  # standard deviation is 10
+
+
+def test_argmax_reducer():
+    """Should keep all bands of the date maximizing one band."""
+    reducer = ArgMax(band=1)
+    data, mask = _dates()
+    data[1, 0, 0, 0] = 0
+    for d, m in zip(data, mask):
+        reducer.update(d, m)
+
+    data, _ = reducer.result()
+    numpy.testing.assert_array_equal(data, [[[0, 5]], [[30, 50]]])
+
+
+@patch("stac_tiler.reader.COGReader", mock_COGReader)
+def test_stack_tile():
+    """Should read a tile from each date."""
+    with TimeStackReader(_items(), max_dates=2) as stack:
+        assert stack.times[0] == "2020-01-01T00:00:00Z"
+        times, data, mask = stack.tile(289, 207, 9, assets=["B01", "B02"])
+        assert times == stack.times
+        assert data.shape == (3, 2, 256, 256)
+        assert mask.shape == (3, 256, 256)
+
+        data, mask = stack.tile(289, 207, 9, expression="B02/B01", reducer="max")
+        assert data.shape == (1, 256, 256)
+        assert mask.shape == (256, 256)
+
+        with pytest.raises(TileOutsideBounds):
+            stack.tile(0, 0, 9, assets="B01")
+
+        series = stack.point(23.7, 32, assets="B01")
+        assert [time for time, _ in series] == stack.times
+        assert len(series[0][1]) == 1
+        assert not stack.point(0, 0, assets="B01")
+
+    with TimeStackReader(
+        [STAC_PATH], reader_options={"include_assets": {"B01"}}
+    ) as stack:
+        assert stack.readers[0].assets == ["B01"]